@@ -0,0 +1,85 @@
+# benchmarks/booking_contention.py
+#
+# Prueba de estrés de la reserva atómica: lanza cientos de POST /reservations/
+# simultáneos contra la app y comprueba que no haya dobles reservas.
+#
+# Apúntalo a un mongod local desechable (MONGO_URI / DB_NAME), nunca a producción:
+#
+#   python -m benchmarks.booking_contention --requests 300
+#
+# Escenarios:
+#   same-slot   todas las peticiones piden el mismo horario -> exactamente 1 debe ganar
+#   disjoint    cada petición pide un minuto distinto        -> todas deben ganar
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+import httpx
+
+from main import app
+
+BENCH_EMAIL = "bench-booking@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+async def _token(client: httpx.AsyncClient) -> str:
+    await client.post("/users/register", json={"name": "bench", "email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    response = await client.post("/auth/login", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def _minute(m: int) -> str:
+    return f"{m // 60:02d}:{m % 60:02d}"
+
+
+async def run(requests: int, scenario: str, day: date) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        headers = {"Authorization": f"Bearer {await _token(client)}"}
+        room = await client.post("/rooms/", json={"name": "bench-room", "ubication": "bench"}, headers=headers)
+        id_room = room.json()["_id"]
+
+        def body(i: int) -> dict:
+            start = 8 * 60 if scenario == "same-slot" else i % (24 * 60 - 1)
+            return {
+                "name_event": f"bench-{i}",
+                "description": "booking contention",
+                "select_date": day.isoformat(),
+                "start_time": _minute(start),
+                "end_time": _minute(start + (60 if scenario == "same-slot" else 1)),
+                "id_room": id_room,
+            }
+
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.post("/reservations/", json=body(i), headers=headers) for i in range(requests))
+        )
+        elapsed = time.perf_counter() - started
+
+    statuses = Counter(r.status_code for r in responses)
+    expected = 1 if scenario == "same-slot" else requests
+    return {
+        "scenario": scenario,
+        "requests": requests,
+        "elapsed_s": round(elapsed, 3),
+        "statuses": dict(statuses),
+        "expected_created": expected,
+        "ok": statuses.get(201, 0) == expected,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reservas concurrentes sobre el mismo horario")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--scenario", choices=["same-slot", "disjoint"], default="same-slot")
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today() + timedelta(days=365))
+    args = parser.parse_args()
+    result = asyncio.run(run(args.requests, args.scenario, args.date))
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["ok"] else 1)
@@ -0,0 +1,168 @@
+# benchmarks/harness.py
+#
+# Piezas comunes para las pruebas de carga: levantar un mongod desechable, cargar la app
+# apuntando a él, sembrar datos y resumir latencias.
+#
+# El mongod se arranca en un directorio temporal con un puerto libre y se borra al salir;
+# el binario se busca en el PATH (o en MONGOD_BIN). Con --backend uri se usa el servidor
+# de MONGO_URI, pero siempre sobre una base propia (--db-name) que se vacía antes de sembrar.
+
+import os
+import random
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Dict, Iterator, List
+
+BENCH_PASSWORD = "bench-password"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_mongod(startup_timeout: float = 30.0) -> Iterator[str]:
+    """Arranca un mongod en un directorio temporal y devuelve su URI."""
+    binary = os.getenv("MONGOD_BIN") or shutil.which("mongod")
+    if not binary:
+        raise SystemExit("No se encontró mongod en el PATH (o define MONGOD_BIN), o usa --backend uri")
+
+    from pymongo import MongoClient
+
+    dbpath = tempfile.mkdtemp(prefix="bench-mongod-")
+    port = _free_port()
+    process = subprocess.Popen(
+        [binary, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.STDOUT,
+    )
+    uri = f"mongodb://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if process.poll() is not None:
+                raise SystemExit(f"mongod terminó al arrancar (código {process.returncode})")
+            try:
+                MongoClient(uri, serverSelectionTimeoutMS=500).admin.command("ping")
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    raise SystemExit("mongod no respondió a tiempo")
+        yield uri
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+
+def load_app(mongo_uri: str, db_name: str):
+    """Importa main.app ya configurado contra `mongo_uri`/`db_name`.
+
+    config.settings lee el entorno al importarse, así que esto debe llamarse
+    antes de cualquier import de la app. El cliente de Mongo lo crea el lifespan.
+    """
+    os.environ["MONGO_URI"] = mongo_uri
+    os.environ["DB_NAME"] = db_name
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+    from main import app
+    return app
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies_ms: List[float], elapsed: float, statuses: Dict[int, int], errors: int) -> dict:
+    """Resumen en el formato que se compara entre corridas."""
+    summary = {
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies_ms) / elapsed, 2) if elapsed else 0.0,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+    if latencies_ms:
+        summary.update(
+            p50_ms=round(percentile(latencies_ms, 50), 2),
+            p95_ms=round(percentile(latencies_ms, 95), 2),
+            p99_ms=round(percentile(latencies_ms, 99), 2),
+        )
+    return summary
+
+
+async def seed(client, db, users: int, rooms: int, reservations: int, rng: random.Random) -> dict:
+    """Siembra salas por la API y usuarios y reservaciones directo en Mongo.
+
+    Las reservaciones se insertan en bloque (una hora cada una, sin traslapes por sala)
+    y después se reconstruye la ocupación, igual que `python -m utils.occupancy rebuild`.
+    """
+    from utils.auth_utils import hash_password
+    from utils.jwt_utils import create_access_token
+    from utils.occupancy import rebuild_occupancy
+
+    for collection in ("users", "rooms", "reservations", "reservation_occupancy", "revoked_token", "refresh_tokens", "collection_versions"):
+        await db[collection].delete_many({})
+
+    # Usuarios directo en Mongo con un solo hash: sembrar no debe gastar los límites de
+    # /auth/login ni /users/register (utils/admission.py)
+    password = hash_password(BENCH_PASSWORD)
+    emails = [f"bench-{i}@example.com" for i in range(users)]
+    result = await db["users"].insert_many(
+        [{"name": email.split("@")[0], "email": email, "password": password} for email in emails]
+    )
+    tokens = {email: create_access_token({"sub": str(oid)}) for email, oid in zip(emails, result.inserted_ids)}
+
+    headers = {"Authorization": f"Bearer {tokens[emails[0]]}"}
+    room_ids = []
+    for i in range(rooms):
+        response = await client.post("/rooms/", json={"name": f"bench-room-{i}", "ubication": "bench"}, headers=headers)
+        response.raise_for_status()
+        room_ids.append(response.json()["_id"])
+
+    user_docs = await db["users"].find({"email": {"$in": emails}}, {"name": 1}).to_list(length=None)
+    from bson import ObjectId
+
+    first_day = date.today() - timedelta(days=30)
+    docs = []
+    for i in range(reservations):
+        slot = i // rooms
+        day = first_day + timedelta(days=slot // 10)
+        start = datetime.combine(day, dtime(8 + slot % 10))
+        owner = rng.choice(user_docs)
+        docs.append({
+            "name_user": owner["name"],
+            "name_event": f"bench-event-{i}",
+            "description": "seed",
+            "start_time": start,
+            "end_time": start + timedelta(hours=1),
+            "select_date": datetime.combine(day, dtime.min),
+            "materia": None,
+            "id_user": owner["_id"],
+            "id_room": ObjectId(room_ids[i % rooms]),
+            "created_at": datetime.utcnow(),
+        })
+    for offset in range(0, len(docs), 1000):
+        await db["reservations"].insert_many(docs[offset:offset + 1000])
+    await rebuild_occupancy(db)
+
+    reservation_ids = [str(doc["_id"]) for doc in docs]
+    return {
+        "emails": emails,
+        "tokens": list(tokens.values()),
+        "room_ids": room_ids,
+        "reservation_ids": reservation_ids,
+        "last_seeded_day": first_day + timedelta(days=max(0, reservations - 1) // rooms // 10),
+    }
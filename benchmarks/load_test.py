@@ -0,0 +1,243 @@
+# benchmarks/load_test.py
+#
+# Prueba de carga reproducible: arranca un mongod desechable, levanta main.app (con su
+# lifespan, así que también se crean los índices), siembra datos y corre escenarios fijos.
+# Imprime un JSON con throughput y p50/p95/p99 por escenario para comparar corridas.
+#
+#   python -m benchmarks.load_test                          # mongod temporal (PATH o MONGOD_BIN)
+#   python -m benchmarks.load_test --backend uri            # servidor de MONGO_URI, base agenda_bench
+#   python -m benchmarks.load_test --reservations 50000 --duration 20 --output antes.json
+#
+# Escenarios:
+#   login      tormenta de POST /auth/login con usuarios sembrados
+#   list       lecturas paginadas de GET /reservations/ siguiendo el cursor
+#   contention ráfaga de POST /reservations/ al mismo horario -> exactamente 1 debe ganar
+#   mixed      tráfico mixto: 85% lecturas (listados, detalle, salas) y 15% reservas nuevas
+#
+# Con la misma --seed, los datos sembrados y la secuencia de operaciones son los mismos.
+# Todas las peticiones salen de la misma IP, así que en "login" los límites de admisión
+# (AUTH_* en config.py) responden 429 pronto; para medir solo bcrypt súbelos por entorno:
+#
+#   AUTH_RATE_PER_IP_PER_MINUTE=1e9 AUTH_BURST_PER_IP=1000000 \
+#   AUTH_RATE_PER_EMAIL_PER_MINUTE=1e9 AUTH_BURST_PER_EMAIL=1000000 python -m benchmarks.load_test
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from collections import Counter
+from datetime import timedelta
+
+import httpx
+
+from benchmarks import harness
+
+SCENARIOS = ["login", "list", "contention", "mixed"]
+
+
+async def closed_loop(op, concurrency: int, duration: float) -> dict:
+    """Corre `concurrency` trabajadores llamando a `op(worker)` hasta que se acabe el tiempo."""
+    latencies, statuses = [], Counter()
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                code = await op(index)
+            except Exception:
+                code = 0
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[code] += 1
+            if code == 0 or code >= 500:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return harness.summarize(latencies, time.perf_counter() - started, statuses, errors)
+
+
+def _slot_body(day, start_minute: int, length: int, id_room: str, name: str) -> dict:
+    end_minute = start_minute + length
+    return {
+        "name_event": name,
+        "description": "load test",
+        "select_date": day.isoformat(),
+        "start_time": f"{start_minute // 60:02d}:{start_minute % 60:02d}",
+        "end_time": f"{end_minute // 60:02d}:{end_minute % 60:02d}",
+        "id_room": id_room,
+    }
+
+
+async def login_scenario(client, data, rng, args) -> dict:
+    emails = data["emails"]
+
+    async def op(_):
+        email = rng.choice(emails)
+        response = await client.post("/auth/login", data={"username": email, "password": harness.BENCH_PASSWORD})
+        return response.status_code
+
+    return await closed_loop(op, args.concurrency, args.duration)
+
+
+async def list_scenario(client, data, rng, args) -> dict:
+    cursors = [None] * args.concurrency
+
+    async def op(worker):
+        params = {"limit": args.page_size}
+        if cursors[worker]:
+            params["next"] = cursors[worker]
+        response = await client.get("/reservations/", params=params)
+        if response.status_code == 200:
+            # Al llegar al final se vuelve a empezar desde la primera página
+            cursors[worker] = response.json().get("next")
+        return response.status_code
+
+    return await closed_loop(op, args.concurrency, args.duration)
+
+
+async def contention_scenario(client, data, rng, args) -> dict:
+    headers = {"Authorization": f"Bearer {data['tokens'][0]}"}
+    day = data["last_seeded_day"] + timedelta(days=30)
+    body = _slot_body(day, 8 * 60, 60, data["room_ids"][0], "contention")
+
+    async def one():
+        started = time.perf_counter()
+        try:
+            response = await client.post("/reservations/", json=body, headers=headers)
+            code = response.status_code
+        except Exception:
+            code = 0
+        return code, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(args.contenders)))
+    elapsed = time.perf_counter() - started
+
+    statuses = Counter(code for code, _ in results)
+    errors = sum(count for code, count in statuses.items() if code == 0 or code >= 500)
+    summary = harness.summarize([latency for _, latency in results], elapsed, statuses, errors)
+    summary["ok"] = statuses.get(201, 0) == 1
+    return summary
+
+
+async def mixed_scenario(client, data, rng, args) -> dict:
+    tokens = data["tokens"]
+    reservation_ids = data["reservation_ids"]
+    room_ids = data["room_ids"]
+    # Cada reserva nueva va a un bloque de 30 min distinto, lejos de los datos sembrados
+    slots = itertools.count()
+    first_day = data["last_seeded_day"] + timedelta(days=60)
+
+    async def op(worker):
+        roll = rng.random()
+        if roll < 0.50:
+            response = await client.get("/reservations/", params={"limit": args.page_size})
+        elif roll < 0.70 and reservation_ids:
+            response = await client.get(f"/reservations/{rng.choice(reservation_ids)}")
+        elif roll < 0.85:
+            response = await client.get("/rooms/", params={"limit": args.page_size})
+        else:
+            slot = next(slots)
+            body = _slot_body(
+                first_day + timedelta(days=slot // 48), (slot % 48) * 30, 30,
+                rng.choice(room_ids), f"mixed-{slot}",
+            )
+            headers = {"Authorization": f"Bearer {rng.choice(tokens)}"}
+            response = await client.post("/reservations/", json=body, headers=headers)
+        return response.status_code
+
+    return await closed_loop(op, args.concurrency, args.duration)
+
+
+RUNNERS = {
+    "login": login_scenario,
+    "list": list_scenario,
+    "contention": contention_scenario,
+    "mixed": mixed_scenario,
+}
+
+
+async def run(args, mongo_uri: str) -> dict:
+    app = harness.load_app(mongo_uri, args.db_name)
+    rng = random.Random(args.seed)
+
+    async with app.router.lifespan_context(app):
+        from database.connection import get_database
+
+        db = get_database()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            seed_started = time.perf_counter()
+            data = await harness.seed(client, db, args.users, args.rooms, args.reservations, rng)
+            seed_elapsed = time.perf_counter() - seed_started
+
+            results = {}
+            for name in args.scenarios:
+                results[name] = await RUNNERS[name](client, data, rng, args)
+
+    return {
+        "backend": args.backend,
+        "seed": args.seed,
+        "config": {
+            "users": args.users,
+            "rooms": args.rooms,
+            "reservations": args.reservations,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "contenders": args.contenders,
+            "page_size": args.page_size,
+        },
+        "seed_elapsed_s": round(seed_elapsed, 3),
+        "scenarios": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga reproducible de la API")
+    parser.add_argument("--backend", choices=["mongod", "uri"], default="mongod",
+                        help="mongod temporal o el servidor de MONGO_URI")
+    parser.add_argument("--db-name", default="agenda_bench", help="Base que se vacía y siembra")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--reservations", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por escenario")
+    parser.add_argument("--contenders", type=int, default=300, help="POST simultáneos en contention")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Además de imprimir, guarda el JSON en este archivo")
+    args = parser.parse_args()
+    if args.users < 1 or args.rooms < 1:
+        parser.error("--users y --rooms deben ser al menos 1")
+
+    if args.backend == "mongod":
+        with harness.local_mongod() as uri:
+            result = asyncio.run(run(args, uri))
+    else:
+        import os
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        if not os.getenv("MONGO_URI"):
+            parser.error("--backend uri requiere MONGO_URI")
+        result = asyncio.run(run(args, os.environ["MONGO_URI"]))
+
+    report = json.dumps(result, indent=2, default=str)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(report + "\n")
+
+    contention = result["scenarios"].get("contention")
+    return 0 if contention is None or contention["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
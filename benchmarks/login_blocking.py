@@ -0,0 +1,98 @@
+# benchmarks/login_blocking.py
+#
+# Mide la latencia de GET /rooms/ mientras hay logins concurrentes, para comparar
+# bcrypt dentro del event loop (antes) contra bcrypt en el pool de hilos (después).
+#
+# Usa la base de datos configurada en .env (MONGO_URI / DB_NAME) y requiere httpx:
+#
+#   python -m benchmarks.login_blocking --mode sync     # bcrypt bloqueando el loop
+#   python -m benchmarks.login_blocking --mode async    # bcrypt en el pool
+#
+# Imprime un JSON con p50/p95/p99 de las sondas a /rooms/.
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import httpx
+
+# Aquí se mide bcrypt, no el limitador de login: sin límites por IP/correo
+for _name, _value in (
+    ("AUTH_RATE_PER_IP_PER_MINUTE", "1e9"), ("AUTH_BURST_PER_IP", "1000000"),
+    ("AUTH_RATE_PER_EMAIL_PER_MINUTE", "1e9"), ("AUTH_BURST_PER_EMAIL", "1000000"),
+):
+    os.environ.setdefault(_name, _value)
+
+from main import app
+from routers import auth_router
+from utils.auth_utils import verify_and_update
+
+BENCH_EMAIL = "bench-login@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+async def _inline_verify(plain_password: str, hashed_password: str):
+    # Comportamiento anterior: verify síncrono dentro del handler
+    return verify_and_update(plain_password, hashed_password)
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(mode: str, logins: int, duration: float, probe_interval: float) -> dict:
+    if mode == "sync":
+        auth_router.verify_and_update_async = _inline_verify
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/users/register", json={"name": "bench", "email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+
+        deadline = time.perf_counter() + duration
+        probe_latencies = []
+        login_count = 0
+
+        async def login_worker():
+            nonlocal login_count
+            while time.perf_counter() < deadline:
+                await client.post("/auth/login", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD})
+                login_count += 1
+
+        async def probe():
+            # La latencia se mide desde el instante en que la sonda *debía* salir,
+            # así un event loop bloqueado cuenta como espera y no se esconde
+            scheduled = time.perf_counter()
+            while scheduled < deadline:
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                await client.get("/rooms/", params={"limit": 10})
+                probe_latencies.append((time.perf_counter() - scheduled) * 1000)
+                scheduled = max(scheduled + probe_interval, time.perf_counter())
+
+        await asyncio.gather(probe(), *(login_worker() for _ in range(logins)))
+
+    return {
+        "mode": mode,
+        "concurrent_logins": logins,
+        "duration_s": duration,
+        "logins_completed": login_count,
+        "rooms_probes": len(probe_latencies),
+        "rooms_p50_ms": round(statistics.median(probe_latencies), 2),
+        "rooms_p95_ms": round(_percentile(probe_latencies, 95), 2),
+        "rooms_p99_ms": round(_percentile(probe_latencies, 99), 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latencia de /rooms/ durante logins concurrentes")
+    parser.add_argument("--mode", choices=["sync", "async"], default="async")
+    parser.add_argument("--logins", type=int, default=16, help="Logins concurrentes")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de prueba")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="Pausa entre sondas a /rooms/")
+    args = parser.parse_args()
+    result = asyncio.run(run(args.mode, args.logins, args.duration, args.probe_interval))
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,87 @@
+# benchmarks/round_trips.py
+#
+# Cuenta los comandos que el driver manda a Mongo en cada mutación (RoundTripListener en
+# database/repository.py, también los db[...] directos) y falla si alguna pasa de su
+# presupuesto. Sirve para detectar regresiones como volver a leer el documento después
+# de un update.
+#
+#   python -m benchmarks.round_trips
+#
+# Usa la base de datos de .env (MONGO_URI / DB_NAME); apúntalo a un mongod local desechable.
+
+import asyncio
+import json
+import os
+import sys
+import uuid
+
+import httpx
+
+# Que el refresco periódico de la caché de revocados no caiga a la mitad de una medición
+os.environ.setdefault("REVOCATION_CACHE_STALENESS_SECONDS", "3600")
+
+from database.repository import count_round_trips
+from main import app
+
+# Viajes esperados por operación en el camino feliz, con las cachés de auth ya calientes
+BUDGET = {
+    "POST /rooms/": 2,                                        # insert + versión
+    "PUT /rooms/{id}": 2,                                     # find_one_and_update + versión
+    "DELETE /rooms/{id}": 2,                                  # find_one_and_delete + versión
+    "POST /reservations/": 4,                                 # sala + ocupación + insert + versión
+    "PUT /reservations/{id} (sin cambio de horario)": 2,      # find_one_and_update + versión
+    "DELETE /reservations/{id}": 3,                           # find_one_and_delete + ocupación + versión
+    "POST /rooms/batch": 1,
+    "POST /reservations/batch": 1,
+    "PUT /users/{id}": 1,
+    "DELETE /users/{id}": 3,                                  # usuario (el PUT invalidó su caché) + delete + refresh tokens
+}
+
+
+async def run() -> dict:
+    transport = httpx.ASGITransport(app=app)
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    measured = {}
+    operations = {}
+
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/users/register", json={"name": "bench", "email": email, "password": "bench-password"})
+        login = (await client.post("/auth/login", data={"username": email, "password": "bench-password"})).json()
+        headers = {"Authorization": f"Bearer {login['access_token']}"}
+        # Calienta la caché de revocados y la de usuarios autenticados
+        (await client.post("/users/batch", json={"ids": [login["id"]]}, headers=headers)).raise_for_status()
+
+        async def measure(label, method, url, **kwargs):
+            with count_round_trips() as trips:
+                response = await client.request(method, url, headers=headers, **kwargs)
+            response.raise_for_status()
+            measured[label] = trips.count
+            operations[label] = trips.operations
+            return response
+
+        room = (await measure("POST /rooms/", "POST", "/rooms/", json={"name": "bench", "ubication": "bench"})).json()
+        await measure("PUT /rooms/{id}", "PUT", f"/rooms/{room['_id']}", json={"capacity": 10})
+
+        reservation = (await measure("POST /reservations/", "POST", "/reservations/", json={
+            "name_event": "bench", "description": "round trips", "select_date": "2099-01-01",
+            "start_time": "08:00", "end_time": "09:00", "id_room": room["_id"],
+        })).json()
+        await measure(
+            "PUT /reservations/{id} (sin cambio de horario)", "PUT",
+            f"/reservations/{reservation['id_reservation']}", json={"name_event": "bench 2"},
+        )
+        await measure("POST /rooms/batch", "POST", "/rooms/batch", json={"ids": [room["_id"]] * 3})
+        await measure("POST /reservations/batch", "POST", "/reservations/batch", json={"ids": [reservation["id_reservation"]]})
+        await measure("DELETE /reservations/{id}", "DELETE", f"/reservations/{reservation['id_reservation']}")
+        await measure("DELETE /rooms/{id}", "DELETE", f"/rooms/{room['_id']}")
+        await measure("PUT /users/{id}", "PUT", f"/users/{login['id']}", json={"name": "bench 2", "email": email})
+        await measure("DELETE /users/{id}", "DELETE", f"/users/{login['id']}")
+
+    over = {label: count for label, count in measured.items() if count > BUDGET[label]}
+    return {"round_trips": measured, "budget": BUDGET, "over_budget": over, "operations": operations}
+
+
+if __name__ == "__main__":
+    result = asyncio.run(run())
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(1 if result["over_budget"] else 0)
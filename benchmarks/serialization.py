@@ -0,0 +1,81 @@
+# benchmarks/serialization.py
+#
+# Costo de serialización por documento para un listado de reservaciones, sin base de datos:
+#
+#   python -m benchmarks.serialization --docs 10000
+#
+#   pydantic   format_reservation_doc + validación/serialización del response_model
+#              (lo que hacía FastAPI con Page[ReservationResponseModel])
+#   fast       reservation_to_json + orjson (utils/serialization.py)
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from routers.reservation_router import format_reservation_doc
+from schemas.page_schema import Page
+from schemas.reservation_schema import ReservationResponseModel
+from utils.serialization import FastJSONResponse, page_to_json, reservation_to_json
+
+
+def make_docs(n: int) -> List[dict]:
+    base = datetime(2026, 1, 5)
+    docs = []
+    for i in range(n):
+        day = base + timedelta(days=i % 120)
+        start = day + timedelta(hours=7 + i % 10)
+        docs.append({
+            "_id": ObjectId(),
+            "name_user": "Profesor de prueba",
+            "name_event": f"Clase {i}",
+            "description": "Reservación generada para medir la serialización " * 3,
+            "select_date": day,
+            "start_time": start,
+            "end_time": start + timedelta(minutes=50),
+            "materia": "Física",
+            "id_user": ObjectId(),
+            "id_room": ObjectId(),
+        })
+    return docs
+
+
+def bench_pydantic(docs: List[dict]) -> bytes:
+    adapter = TypeAdapter(Page[ReservationResponseModel])
+    page = Page[ReservationResponseModel](items=[format_reservation_doc(d) for d in docs], next=None)
+    # FastAPI vuelve a validar el valor devuelto contra el response_model antes de serializar
+    return adapter.dump_json(adapter.validate_python(page, from_attributes=True), by_alias=True)
+
+
+def bench_fast(docs: List[dict]) -> bytes:
+    return FastJSONResponse(page_to_json([reservation_to_json(d) for d in docs], None)).body
+
+
+def timeit(fn, docs, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Costo de serialización de reservaciones")
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = make_docs(args.docs)
+    assert json.loads(bench_pydantic(docs[:50])) == json.loads(bench_fast(docs[:50])), "las salidas difieren"
+
+    results = {}
+    for name, fn in (("pydantic", bench_pydantic), ("fast", bench_fast)):
+        seconds = timeit(fn, docs, args.repeat)
+        results[name] = {"total_ms": round(seconds * 1000, 2), "per_doc_us": round(seconds / args.docs * 1e6, 2)}
+    results["speedup"] = round(results["pydantic"]["total_ms"] / results["fast"]["total_ms"], 2)
+    print(json.dumps({"docs": args.docs, **results}, indent=2))
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings 
 from pydantic import Field
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -12,10 +13,88 @@ class Settings(BaseSettings):
     # Algoritmo JWT
     ALGORITHM: str = "HS256"
     
-    # Duración del token de acceso (en minutos)
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Duración del token de acceso (en minutos); se renueva con POST /auth/refresh
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+
+    # Duración de los refresh tokens (rotan en cada uso)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+
+    # Paginación de listados (tamaño por defecto y tope del servidor)
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 200
+
+    # Documentos por lote que pide el cursor de Mongo al exportar
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Caché local de tokens revocados: retraso máximo respecto a Mongo y tope de entradas
+    REVOCATION_CACHE_STALENESS_SECONDS: float = 5.0
+    REVOCATION_CACHE_MAX_ENTRIES: int = 100_000
+    # Cada refresco relee este margen hacia atrás: inserciones lentas o relojes desfasados entre hosts
+    REVOCATION_CLOCK_SKEW_SECONDS: float = 30.0
+
+    # Caché de usuarios autenticados en get_current_user
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10_000
+
+    # Hilos dedicados a bcrypt (hash_password_async / verify_password_async)
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Costo de bcrypt; calibrar con `python -m utils.auth_utils --target-ms 250`.
+    # Los hashes con otro costo se rehashean en segundo plano al iniciar sesión
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: float = 250.0
+    # Al arrancar: "off", "warn" (solo avisa si el costo no cuadra) o "apply" (usa el calibrado)
+    BCRYPT_STARTUP_CHECK: Literal["off", "warn", "apply"] = "off"
+
+    # Admisión de login/registro: espera máxima por un hilo de bcrypt antes de responder 429
+    AUTH_HASH_MAX_WAITING: int = 32
+    AUTH_HASH_MAX_WAIT_SECONDS: float = 2.0
+    # Token buckets por correo y por IP (intentos por minuto y ráfaga permitida)
+    AUTH_RATE_PER_EMAIL_PER_MINUTE: float = 10
+    AUTH_BURST_PER_EMAIL: int = 5
+    AUTH_RATE_PER_IP_PER_MINUTE: float = 60
+    AUTH_BURST_PER_IP: int = 20
+    AUTH_RATE_LIMIT_MAX_KEYS: int = 100_000
+
+    # Rango máximo (en días) de GET /availability
+    AVAILABILITY_MAX_DAYS: int = 186
+
+    # Máximo de ocurrencias en POST /reservations/bulk
+    BULK_MAX_RESERVATIONS: int = 200
+
+    # Máximo de ids por petición en los endpoints POST /.../batch
+    BATCH_MAX_IDS: int = 500
+
+    # Eventos SSE de reservaciones (GET /reservations/stream)
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_MAX_SUBSCRIBERS: int = 10_000
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    # Leer los eventos de un change stream de MongoDB (requiere replica set)
+    EVENTS_CHANGE_STREAM: bool = False
+
+    # Compresión de respuestas (Accept-Encoding): tamaño mínimo y codificaciones en orden de preferencia
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: str = "zstd,br,gzip"
+
+    # Archivo de reservaciones viejas (utils/archive.py): horizonte, periodo de cada colección y pasadas
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_HORIZON_DAYS: int = 365
+    ARCHIVE_TERM_MONTHS: int = 6
+    ARCHIVE_BATCH_SIZE: int = 1000
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+    ARCHIVE_LEASE_SECONDS: float = 600.0
+    ARCHIVE_STATE_TTL_SECONDS: float = 30.0
 
     DB_NAME: str
+
+    # Pool de conexiones a MongoDB (el cliente se crea en el lifespan)
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_MAX_IDLE_TIME_MS: int = 300_000
+    # Conexiones que se abren al arrancar para que las primeras peticiones no paguen el handshake
+    MONGO_WARMUP_CONNECTIONS: int = 10
+    # Compresión del protocolo, en orden de preferencia ("" para desactivarla)
+    MONGO_COMPRESSORS: str = "zstd,snappy,zlib"
     
     class Config:
         env_file = ".env"
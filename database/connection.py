@@ -1,34 +1,90 @@
 # database/connection.py
+#
+# El cliente de Mongo se crea y se cierra en el lifespan de la app (ver main.py), con la
+# configuración de `config.settings`. Fuera de la app (CLIs, benchmarks) usar `connect()`
+# y `close()` directamente.
 
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-import os
+import asyncio
+from typing import Optional
 
-load_dotenv()  # Cargar variables desde .env
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ReadPreference
 
-# Leer URI completa de MongoDB Atlas
-MONGO_URI = os.getenv("MONGO_URI")
-if not MONGO_URI:
-    raise Exception("La variable de entorno MONGO_URI no está definida")
+from config import Settings, settings
+from utils.metrics import MongoCommandMetrics
+from database.repository import RoundTripListener
 
-# Nombre de la base de datos, por defecto agenda_audiovisual
-DB_NAME = os.getenv("DB_NAME")
-if not DB_NAME:
-    raise Exception("La variable de entorno DB_NAME no está definida")
+client: Optional[AsyncIOMotorClient] = None
+_db: Optional[AsyncIOMotorDatabase] = None
+_read_db: Optional[AsyncIOMotorDatabase] = None
 
-# Crear cliente Mongo (compatible con Atlas)
-client = AsyncIOMotorClient(MONGO_URI)
 
-# Conectar a la base de datos
-db = client[DB_NAME]
+def create_client(config: Settings = settings) -> AsyncIOMotorClient:
+    # Compresores no instalados (zstandard / python-snappy) se ignoran con un warning de pymongo
+    compressors = [name.strip() for name in config.MONGO_COMPRESSORS.split(",") if name.strip()]
+    options = dict(
+        maxPoolSize=config.MONGO_MAX_POOL_SIZE,
+        minPoolSize=config.MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=config.MONGO_MAX_IDLE_TIME_MS,
+        # /metrics y el conteo de viajes de benchmarks/round_trips.py
+        event_listeners=[MongoCommandMetrics(), RoundTripListener()],
+    )
+    if compressors:
+        options["compressors"] = compressors
+    return AsyncIOMotorClient(config.MONGO_URI, **options)
 
-#print(">>> MONGO_URI:", MONGO_URI)
-#print(">>> DB_NAME:", DB_NAME)
-#print(">>> Cliente creado:", client)
+
+async def warm_up(database: AsyncIOMotorDatabase, connections: int) -> None:
+    """Abre `connections` sockets del pool con pings simultáneos.
+
+    minPoolSize los crea en segundo plano; esto los deja listos antes de la primera petición.
+    """
+    if connections <= 0:
+        return
+    await asyncio.gather(*(database.command("ping") for _ in range(connections)))
+    if _read_db is not None and database is _db:
+        # Si las lecturas van a secundarios, calentar también esos pools
+        await asyncio.gather(*(
+            _read_db.command("ping", read_preference=_read_db.read_preference)
+            for _ in range(connections)
+        ))
+
+
+async def connect(config: Settings = settings) -> AsyncIOMotorDatabase:
+    """Crea el cliente global y calienta el pool. Devuelve la base principal."""
+    global client, _db, _read_db
+    if client is not None:
+        return _db
+
+    client = create_client(config)
+    _db = client.get_database(config.DB_NAME)
+    _read_db = client.get_database(
+        config.DB_NAME,
+        read_preference=ReadPreference.SECONDARY_PREFERRED,
+    )
+    await warm_up(_db, config.MONGO_WARMUP_CONNECTIONS)
+    return _db
+
+
+def close() -> None:
+    global client, _db, _read_db
+    if client is not None:
+        client.close()
+    client = _db = _read_db = None
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    if _db is None:
+        raise RuntimeError("MongoDB no está conectado; llama a connect() (lo hace el lifespan de la app)")
+    return _db
 
 
 # Retornar la instancia de la DB
-async def get_db() -> AsyncIOMotorClient:
-    #print(">>> get_db ejecutado, db:", db)
-    #print(">>> Tipo real de db:", type(db))
-    return db
\ No newline at end of file
+async def get_db() -> AsyncIOMotorDatabase:
+    return get_database()
+
+
+# Para GET de solo lectura que toleran leer de un secundario (datos con un pequeño retraso)
+async def get_read_db() -> AsyncIOMotorDatabase:
+    get_database()
+    return _read_db
@@ -0,0 +1,169 @@
+# database/indexes.py
+#
+# Índices que necesita la aplicación. Se reconcilian al arrancar (lifespan en main.py)
+# y también se pueden revisar desde la terminal:
+#
+#   python -m database.indexes --dry-run      # solo reporta faltantes / sobrantes
+#   python -m database.indexes                # crea los faltantes
+#   python -m database.indexes --drop-extra   # además elimina los no declarados
+
+import argparse
+import asyncio
+import logging
+from typing import Dict, List
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "reservations": [
+        # Búsqueda de traslapes (select_date + start_time) y orden de la paginación
+        IndexModel(
+            [("select_date", ASCENDING), ("start_time", ASCENDING), ("_id", ASCENDING)],
+            name="select_date_start_time",
+        ),
+        # Traslapes por sala y GET /rooms/{id}/reservations (con _id el orden del cursor sale del índice)
+        IndexModel(
+            [("id_room", ASCENDING), ("select_date", ASCENDING), ("start_time", ASCENDING), ("_id", ASCENDING)],
+            name="id_room_select_date",
+        ),
+        # GET /reservations/?id_user=...: filtro y orden del cursor salen del índice
+        IndexModel(
+            [("id_user", ASCENDING), ("select_date", ASCENDING), ("start_time", ASCENDING), ("_id", ASCENDING)],
+            name="id_user_select_date",
+        ),
+    ],
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "revoked_token": [
+        IndexModel([("token", ASCENDING)], name="token"),
+        IndexModel([("token_hash", ASCENDING)], name="token_hash"),
+        # Refresco incremental de la caché de revocación
+        IndexModel([("revoked_dt", ASCENDING)], name="revoked_dt"),
+        # Los tokens revocados se borran solos cuando el JWT expira
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "refresh_tokens": [
+        # Revocar una familia (logout / reutilización) o todas las del usuario
+        IndexModel([("family", ASCENDING)], name="family"),
+        IndexModel([("id_user", ASCENDING)], name="id_user"),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Opciones que cuentan para decidir si un índice existente coincide con el declarado
+_COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _spec(document: dict) -> dict:
+    # Mongo puede devolver la dirección como 1.0 en lugar de 1
+    spec = {"key": [(field, int(d) if isinstance(d, float) else d) for field, d in document["key"]]}
+    for option in _COMPARED_OPTIONS:
+        if document.get(option) is not None:
+            spec[option] = document[option]
+    if spec.get("unique") is False:
+        del spec["unique"]
+    return spec
+
+
+async def _diff_collection(collection, models: List[IndexModel]) -> Dict[str, list]:
+    existing = await collection.index_information()
+    existing.pop("_id_", None)
+    existing = {name: _spec(info) for name, info in existing.items()}
+
+    missing, changed = [], []
+    for model in models:
+        declared = model.document
+        name = declared["name"]
+        if name not in existing:
+            missing.append(model)
+        elif existing[name] != _spec({**declared, "key": list(declared["key"].items())}):
+            changed.append(model)
+
+    declared_names = {model.document["name"] for model in models}
+    extra = [name for name in existing if name not in declared_names]
+    return {"missing": missing, "changed": changed, "extra": extra}
+
+
+async def diff_indexes(db) -> Dict[str, Dict[str, list]]:
+    """Compara los índices declarados con los existentes, colección por colección."""
+    return {collection: await _diff_collection(db[collection], models) for collection, models in INDEXES.items()}
+
+
+async def sync_indexes(collection, models: List[IndexModel]) -> None:
+    """Deja en `collection` los índices `models`: crea los faltantes y reemplaza los distintos.
+
+    Para colecciones que no están en INDEXES, como los periodos del archivo de reservaciones.
+    """
+    diff = await _diff_collection(collection, models)
+    for model in diff["changed"]:
+        await collection.drop_index(model.document["name"])
+    if diff["missing"] or diff["changed"]:
+        await collection.create_indexes(diff["missing"] + diff["changed"])
+
+
+async def ensure_indexes(db, drop_extra: bool = False, dry_run: bool = False) -> Dict[str, Dict[str, list]]:
+    report = await diff_indexes(db)
+    for collection, diff in report.items():
+        for model in diff["missing"] + diff["changed"]:
+            logger.info("Índice %s.%s: %s", collection, model.document["name"], "faltante" if model in diff["missing"] else "distinto")
+        for name in diff["extra"]:
+            logger.info("Índice %s.%s: no declarado", collection, name)
+
+        if dry_run:
+            continue
+
+        # Un índice con el mismo nombre pero otra definición se reemplaza
+        for model in diff["changed"]:
+            await db[collection].drop_index(model.document["name"])
+
+        to_create = diff["missing"] + diff["changed"]
+        if to_create:
+            try:
+                await db[collection].create_indexes(to_create)
+            except OperationFailure as e:
+                # p.ej. correos duplicados que impiden crear el índice único
+                logger.error("No se pudieron crear los índices de %s: %s", collection, e)
+
+        if drop_extra:
+            for name in diff["extra"]:
+                await db[collection].drop_index(name)
+    return report
+
+
+def _print_report(report: Dict[str, Dict[str, list]]) -> bool:
+    clean = True
+    for collection, diff in report.items():
+        for label in ("missing", "changed"):
+            for model in diff[label]:
+                clean = False
+                print(f"[{label}] {collection}.{model.document['name']} {dict(model.document['key'])}")
+        for name in diff["extra"]:
+            clean = False
+            print(f"[extra] {collection}.{name}")
+    if clean:
+        print("Los índices están al día.")
+    return clean
+
+
+async def _main(args) -> int:
+    from database import connection
+
+    db = await connection.connect()
+    try:
+        report = await ensure_indexes(db, drop_extra=args.drop_extra, dry_run=args.dry_run)
+    finally:
+        connection.close()
+    clean = _print_report(report)
+    return 0 if clean or not args.dry_run else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Revisa y reconcilia los índices de MongoDB")
+    parser.add_argument("--dry-run", action="store_true", help="Solo reporta, no modifica nada")
+    parser.add_argument("--drop-extra", action="store_true", help="Elimina índices no declarados")
+    raise SystemExit(asyncio.run(_main(parser.parse_args())))
@@ -0,0 +1,107 @@
+# database/repository.py
+#
+# Acceso a datos compartido por los routers. Las mutaciones se resuelven en un solo
+# viaje a Mongo (find_one_and_update / find_one_and_delete) y la verificación de
+# propietario va dentro del filtro en lugar de leer el documento antes.
+#
+# count_round_trips() cuenta a nivel del driver (RoundTripListener), así que también ve
+# los accesos directos a db[...] de los handlers, no solo los del repositorio.
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument, monitoring
+
+
+class RoundTripCounter:
+    def __init__(self):
+        self.operations = []
+
+    @property
+    def count(self) -> int:
+        return len(self.operations)
+
+
+_current_counter: ContextVar[Optional[RoundTripCounter]] = ContextVar("round_trip_counter", default=None)
+
+
+@contextmanager
+def count_round_trips():
+    """Cuenta los comandos que el driver manda a Mongo dentro del bloque.
+
+    with count_round_trips() as trips:
+        ...
+    assert trips.count == 1
+    """
+    counter = RoundTripCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+# Comandos que el driver manda por su cuenta (handshake, sesiones, cierre de cursores)
+_DRIVER_COMMANDS = {"hello", "ismaster", "isMaster", "saslStart", "saslContinue", "endSessions", "killCursors"}
+
+
+class RoundTripListener(monitoring.CommandListener):
+    """Listener de pymongo que anota cada comando en el contador activo.
+
+    Motor ejecuta pymongo en un pool de hilos pero copia el contexto de la tarea,
+    así que la ContextVar de count_round_trips() llega hasta started().
+    """
+
+    def started(self, event) -> None:
+        counter = _current_counter.get()
+        if counter is None or event.command_name in _DRIVER_COMMANDS:
+            return
+        collection = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        # list.append es atómico: no hace falta candado aunque haya comandos en paralelo
+        counter.operations.append(f"{event.command_name} {collection}" if isinstance(collection, str) else event.command_name)
+
+    def succeeded(self, event) -> None:
+        pass
+
+    def failed(self, event) -> None:
+        pass
+
+
+class Repository:
+    def __init__(self, db, collection: str):
+        self.collection = db[collection]
+
+    async def get(self, id: ObjectId, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.collection.find_one({"_id": id}, projection)
+
+    async def get_many(self, ids: Sequence[ObjectId], projection: Optional[dict] = None) -> Tuple[List[dict], List[ObjectId]]:
+        """Un solo find con $in. Devuelve (documentos en el orden de `ids`, ids que no existen)."""
+        found = {}
+        async for doc in self.collection.find({"_id": {"$in": list(ids)}}, projection):
+            found[doc["_id"]] = doc
+        docs = [found[id] for id in ids if id in found]
+        missing = [id for id in ids if id not in found]
+        return docs, missing
+
+    async def exists(self, query: dict) -> bool:
+        return await self.collection.find_one(query, {"_id": 1}) is not None
+
+    async def insert(self, document: dict) -> dict:
+        # insert_one deja el _id en el documento, no hace falta volver a leerlo
+        await self.collection.insert_one(document)
+        return document
+
+    async def update(self, query: dict, update_data: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        """Aplica $set y devuelve el documento ya actualizado, o None si nada coincide."""
+        return await self.collection.find_one_and_update(
+            query,
+            {"$set": update_data},
+            projection=projection,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def delete(self, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        """Borra y devuelve el documento eliminado, o None si nada coincide."""
+        return await self.collection.find_one_and_delete(query, projection=projection)
@@ -2,28 +2,34 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from utils.jwt_utils import verify_access_token
+from utils.revocation_cache import revocation_cache, token_digest
+from utils.principal_cache import principal_cache, token_cache
 from database.connection import get_db
 from models.user_model import UserPublicModel
 from bson import ObjectId
+import time
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)) -> UserPublicModel:
-    # Verificar si el token fue revocado
-    revoked = await db["revoked_token"].find_one({"token": token})
-    if revoked:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token revocado. Inicia sesión nuevamente.",
-        )
+    # Verificar validez del token (si ya se verificó hace poco, se reutiliza el payload)
+    digest = token_digest(token)
+    payload = token_cache.get(digest)
+    if payload is None or payload.get("exp", 0) <= time.time():
+        try:
+            payload = verify_access_token(token)
+        except JWTError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token inválido o expirado",
+            )
+        token_cache.set(digest, payload, ttl=payload.get("exp", 0) - time.time())
 
-    # Verificar validez del token
-    try:
-        payload = verify_access_token(token)
-    except JWTError:
+    # Verificar si el token fue revocado (caché en memoria, sincronizada con Mongo)
+    if await revocation_cache.is_revoked(db, token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido o expirado",
+            detail="Token revocado. Inicia sesión nuevamente.",
         )
 
     user_id = payload.get("sub")
@@ -41,6 +47,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_d
             detail="ID de usuario inválido en el token",
         )
 
+    cached_user = principal_cache.get(user_id)
+    if cached_user is not None:
+        return cached_user
+
     # Busca el usuario sin las claves de contraseña
     user_data = await db["users"].find_one({"_id": user_obj_id}, {"password": 0, "hashed_password": 0})
     if not user_data:
@@ -51,4 +61,6 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_d
 
     user_data["id"] = str(user_data["_id"])
     user_data["id_user"] = str(user_data["_id"])
-    return UserPublicModel(**user_data)
\ No newline at end of file
+    user = UserPublicModel(**user_data)
+    principal_cache.set(user_id, user)
+    return user
\ No newline at end of file
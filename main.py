@@ -1,9 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import user_router, room_router, reservation_router, auth_router
-from config import Settings  # importar configuración centralizada
+from routers import user_router, room_router, reservation_router, auth_router, availability_router, metrics_router
+from config import Settings, settings  # importar configuración centralizada
+from database import connection
+from database.indexes import ensure_indexes
+from utils.auth_utils import check_bcrypt_cost, shutdown_hash_executor
+from utils.events import broker, watch_reservations
+from utils.archive import run_archiver
+from utils.metrics import MetricsMiddleware
+from utils.compression import CompressionMiddleware
 
-app = FastAPI(title="Api Reservation - Agenda Audiovisual")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cliente de Mongo con el pool ya caliente antes de atender peticiones
+    db = await connection.connect(settings)
+
+    # Crear los índices faltantes antes de atender peticiones
+    await ensure_indexes(db)
+
+    # Medir bcrypt en este equipo (fuera del loop, tarda un par de segundos)
+    if settings.BCRYPT_STARTUP_CHECK != "off":
+        await asyncio.get_running_loop().run_in_executor(None, check_bcrypt_cost)
+
+    # Eventos entre workers a partir del change stream de reservaciones
+    watcher = asyncio.create_task(watch_reservations(db)) if settings.EVENTS_CHANGE_STREAM else None
+
+    # Pasadas periódicas que mueven las reservaciones viejas al archivo
+    archiver = asyncio.create_task(run_archiver(db)) if settings.ARCHIVE_ENABLED else None
+
+    yield
+
+    for task in (watcher, archiver):
+        if task:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    broker.close()
+    shutdown_hash_executor()
+    connection.close()
+
+
+app = FastAPI(title="Api Reservation - Agenda Audiovisual", lifespan=lifespan)
 
 # Configuración de CORS
 app.add_middleware(
@@ -14,8 +54,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión zstd/br/gzip de respuestas grandes (también en streaming)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    encodings=[name.strip() for name in settings.COMPRESSION_ENCODINGS.split(",") if name.strip()],
+)
+
+# Métricas de latencia por ruta (GET /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # Incluir routers
 app.include_router(room_router.router)
 app.include_router(reservation_router.router)
 app.include_router(user_router.router)
-app.include_router(auth_router.router)
\ No newline at end of file
+app.include_router(auth_router.router)
+app.include_router(availability_router.router)
+app.include_router(metrics_router.router)
\ No newline at end of file
@@ -0,0 +1,26 @@
+from bson import ObjectId
+from pydantic import GetJsonSchemaHandler
+from pydantic_core import core_schema
+
+
+# ObjectId de MongoDB para Pydantic v2: acepta ObjectId o su representación en texto
+# y se serializa como string en JSON. Es el único PyObjectId de la app.
+class PyObjectId(ObjectId):
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type, handler):
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(str, when_used="json"),
+        )
+
+    @classmethod
+    def validate(cls, v):
+        if isinstance(v, ObjectId):
+            return v
+        if not ObjectId.is_valid(v):
+            raise ValueError("ID inválido")
+        return ObjectId(v)
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, core_schema, handler: GetJsonSchemaHandler):
+        return {"type": "string"}
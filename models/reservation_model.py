@@ -10,6 +10,7 @@ class ReservationBase(BaseModel):
     end_time: time
     select_date: date
     materia: Optional[str] = None
+    id_room: Optional[str] = None
 
 class ReservationCreate(ReservationBase):
     pass
\ No newline at end of file
@@ -7,7 +7,11 @@ local_tz = pytz.timezone("America/Mexico_City")
 
 class RevokedToken(BaseModel):
     token: Optional[str] = Field(None, max_length=500)
+    # sha256 del token, es lo que usa la caché de revocación en memoria
+    token_hash: Optional[str] = None
     revoked_dt: datetime = Field(default_factory=lambda: datetime.now(local_tz))
+    # Expiración del JWT; el índice TTL borra el documento a partir de aquí
+    expires_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True  # Si usas pydantic v2
\ No newline at end of file
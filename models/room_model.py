@@ -1,16 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional
 from bson import ObjectId
-
-# Para manejar el ObjectId de MongoDB en Pydantic v2
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_pydantic_core_schema__(cls, source, handler):
-        from pydantic_core import core_schema
-        return core_schema.json_or_python_schema(
-            json_schema=core_schema.str_schema(),
-            python_schema=core_schema.is_instance_schema(ObjectId)
-        )
+from models.object_id import PyObjectId
 
 # Modelo base para crear/actualizar salas
 class RoomModel(BaseModel):
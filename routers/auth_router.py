@@ -1,26 +1,52 @@
+import asyncio
+import logging
 from bson import ObjectId
-from fastapi import APIRouter, HTTPException, status, Depends
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from utils.auth_utils import verify_password
+from utils.auth_utils import verify_and_update_async
+from utils.admission import check_auth_rate_limits
 from database.connection import get_db
-from jose import JWTError, jwt
-import os
-from datetime import datetime, timedelta
+from dependencies.dependencies import oauth2_scheme
 from models.user_model import UserPublicModel
+from models.revoked_token_model import RevokedToken
+from schemas.auth_schema import RefreshRequest, LogoutRequest, TokenPair
+from utils.jwt_utils import create_access_token, verify_access_token, verify_refresh_token
+from utils.principal_cache import token_cache
+from utils.refresh_tokens import issue_refresh_token, rotate_refresh_token, revoke_family
+from utils.revocation_cache import revocation_cache, token_digest
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Configuración de variables de entorno
-SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key")  # Reemplaza con tu clave real en .env
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+# Referencias a las escrituras en segundo plano para que el GC no las cancele
+_rehash_tasks = set()
+
+
+async def store_rehash(db, user_id, old_hash: str, new_hash: str) -> None:
+    # Condicional sobre el hash viejo: no pisar un cambio de contraseña concurrente
+    try:
+        await db["users"].update_one({"_id": user_id, "password": old_hash}, {"$set": {"password": new_hash}})
+    except Exception as exc:
+        logger.warning("No se pudo guardar el rehash de %s: %s", user_id, exc)
+
+
+def schedule_rehash(db, user_id, old_hash: str, new_hash: str) -> None:
+    task = asyncio.create_task(store_rehash(db, user_id, old_hash, new_hash))
+    _rehash_tasks.add(task)
+    task.add_done_callback(_rehash_tasks.discard)
 
 
 @router.post("/auth/login")
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db=Depends(get_db)
 ):
+    # Límites por IP y por correo antes de gastar Mongo o bcrypt
+    check_auth_rate_limits(request, form_data.username)
+
     # Buscar usuario por correo electrónico (username = email en OAuth2)
     user_data = await db["users"].find_one({"email": form_data.username})
     if not user_data:
@@ -36,26 +62,68 @@ async def login(
             detail="El usuario no tiene contraseña definida"
         )
 
-    # Verificar la contraseña
-    if not verify_password(form_data.password, hashed_password):
+    # Verificar la contraseña (si el hash tiene un costo distinto al configurado, viene el nuevo)
+    valid, new_hash = await verify_and_update_async(form_data.password, hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Correo o contraseña incorrectos"
         )
+    if new_hash:
+        schedule_rehash(db, user_data["_id"], hashed_password, new_hash)
 
-    # Generar el JWT
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    payload = {
-        "sub": str(user_data["_id"]),  # Asegúrate de convertir ObjectId a string
-        "exp": expire
-    }
-    token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    # Generar el JWT (clave, algoritmo y expiración salen de config.settings)
+    token = create_access_token({"sub": str(user_data["_id"])})
+    refresh_token = await issue_refresh_token(db, str(user_data["_id"]))
 
-    # Devolver token, email y nombre del usuario
+    # Devolver tokens, email y nombre del usuario
     return {
         "access_token": token,
+        "refresh_token": refresh_token,
         "token_type": "bearer",
         "email": user_data.get("email"),
         "name": user_data.get("name", "Sin nombre"),
         "id": str(user_data["_id"])
     }
+
+
+@router.post("/auth/refresh", response_model=TokenPair)
+async def refresh(payload: RefreshRequest, db=Depends(get_db)):
+    # Sin bcrypt: firma del JWT + un update por _id; el refresh token usado deja de servir
+    user_id, refresh_token = await rotate_refresh_token(db, payload.refresh_token)
+    return TokenPair(
+        access_token=create_access_token({"sub": user_id}),
+        refresh_token=refresh_token,
+    )
+
+
+@router.post("/auth/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    payload: Optional[LogoutRequest] = None,
+    token: str = Depends(oauth2_scheme),
+    db=Depends(get_db)
+):
+    claims = verify_access_token(token)
+    # Un segundo logout con el mismo token no se acepta ni escribe otra fila en revoked_token
+    if await revocation_cache.is_revoked(db, token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revocado. Inicia sesión nuevamente.",
+        )
+
+    # Cerrar la sesión completa: la familia del refresh token (si es del mismo usuario)
+    if payload and payload.refresh_token:
+        refresh_claims = verify_refresh_token(payload.refresh_token)
+        if refresh_claims["sub"] != claims["sub"]:
+            raise HTTPException(status_code=403, detail="El refresh token no pertenece a este usuario")
+        await revoke_family(db, refresh_claims.get("family"))
+
+    # Revocar el access token hasta su expiración
+    digest = token_digest(token)
+    expires_at = datetime.fromtimestamp(claims["exp"], timezone.utc)
+    revoked = RevokedToken(token_hash=digest, expires_at=expires_at)
+    await db["revoked_token"].insert_one(revoked.model_dump(exclude_none=True))
+    revocation_cache.add(digest, expires_at)
+    token_cache.invalidate(digest)
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from bson import ObjectId
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+import numpy as np
+
+from database.connection import get_read_db
+from config import settings
+from utils.archive import reservation_collections
+
+router = APIRouter(prefix="/availability", tags=["Availability"])
+
+MINUTES_PER_DAY = 24 * 60
+MS_PER_MINUTE = 60 * 1000
+
+
+async def load_reservation_spans(db, date_from: date, date_to: date, id_room: Optional[ObjectId] = None):
+    """Una consulta por rango; Mongo devuelve (sala, día, minuto inicio, minuto fin).
+
+    Devuelve las filas como enteros (índice de sala, día, inicio, fin) y la lista de salas
+    en el orden de ese índice. Las reservaciones sin sala (anteriores a las salas) van en
+    una fila propia con id_room None.
+    """
+    from_dt = datetime.combine(date_from, time.min)
+    match = {"select_date": {"$gte": from_dt, "$lte": datetime.combine(date_to, time.min)}}
+    if id_room is not None:
+        match["id_room"] = id_room
+    pipeline = [
+        {"$match": match},
+        {"$project": {
+            "_id": 0,
+            "id_room": 1,
+            "day": {"$subtract": ["$select_date", from_dt]},
+            "start": {"$subtract": ["$start_time", "$select_date"]},
+            "end": {"$subtract": ["$end_time", "$select_date"]},
+        }},
+    ]
+    # Un horario ocupado dos veces sigue ocupado: no importa si un documento sale de dos colecciones
+    collections = await reservation_collections(db, date_from, date_to)
+    docs = []
+    for collection in collections:
+        docs.extend(await collection.aggregate(pipeline).to_list(length=None))
+
+    # Todas las salas tienen fila, aunque no tengan reservaciones en el rango
+    if id_room is not None:
+        rooms = [id_room]
+    else:
+        rooms = [room["_id"] async for room in db["rooms"].find({}, {"_id": 1}).sort("_id", 1)]
+    if any(doc.get("id_room") is None for doc in docs):
+        rooms.append(None)
+    if not docs:
+        return np.empty((0, 4), dtype=np.int64), rooms
+
+    # Las reservaciones de salas que ya no existen quedan con índice -1 y busy_matrix las descarta
+    room_index = {room: i for i, room in enumerate(rooms)}
+    spans = np.array(
+        [(room_index.get(doc.get("id_room"), -1), doc["day"], doc["start"], doc["end"]) for doc in docs],
+        dtype=np.int64,
+    )
+    spans[:, 1] //= MINUTES_PER_DAY * MS_PER_MINUTE
+    spans[:, 2:] //= MS_PER_MINUTE
+    return spans, rooms
+
+
+def busy_matrix(spans: np.ndarray, rooms: int, days: int, slot_minutes: int) -> np.ndarray:
+    """Matriz salas x días x slots con True donde hay al menos una reservación."""
+    slots = MINUTES_PER_DAY // slot_minutes
+    if len(spans) == 0:
+        return np.zeros((rooms, days, slots), dtype=bool)
+
+    room_idx = spans[:, 0]
+    day_idx = spans[:, 1]
+    start_slot = np.clip(spans[:, 2] // slot_minutes, 0, slots)
+    end_slot = np.clip(-(-spans[:, 3] // slot_minutes), 0, slots)  # redondeo hacia arriba
+    valid = (room_idx >= 0) & (day_idx >= 0) & (day_idx < days) & (end_slot > start_slot)
+
+    # Arreglo de diferencias: +1 donde empieza, -1 donde termina, y suma acumulada por fila
+    diff = np.zeros((rooms, days, slots + 1), dtype=np.int32)
+    np.add.at(diff, (room_idx[valid], day_idx[valid], start_slot[valid]), 1)
+    np.add.at(diff, (room_idx[valid], day_idx[valid], end_slot[valid]), -1)
+    return np.cumsum(diff, axis=2)[:, :, :slots] > 0
+
+
+def encode_rows(matrix: np.ndarray) -> list:
+    # Cada fila se envía como texto "0"/"1" (un carácter por slot)
+    chars = np.where(matrix, ord("1"), ord("0")).astype(np.uint8)
+    return [row.tobytes().decode("ascii") for row in chars]
+
+
+@router.get("/")
+async def get_availability(
+    date_from: date = Query(..., alias="from", description="Fecha inicial (inclusive)"),
+    date_to: date = Query(..., alias="to", description="Fecha final (inclusive)"),
+    slot: int = Query(15, ge=5, le=240, description="Granularidad del slot en minutos"),
+    id_room: Optional[str] = Query(None, description="Limitar a una sala"),
+    db=Depends(get_read_db)  # tolera leer de un secundario; la reserva valida en el primario
+):
+    if id_room is not None and not ObjectId.is_valid(id_room):
+        raise HTTPException(status_code=400, detail="ID de sala inválido")
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="El rango de fechas es inválido.")
+    if MINUTES_PER_DAY % slot:
+        raise HTTPException(status_code=400, detail="El slot debe dividir exactamente las 24 horas.")
+
+    days = (date_to - date_from).days + 1
+    if days > settings.AVAILABILITY_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango no puede exceder {settings.AVAILABILITY_MAX_DAYS} días.",
+        )
+
+    spans, rooms = await load_reservation_spans(db, date_from, date_to, ObjectId(id_room) if id_room else None)
+    busy = busy_matrix(spans, len(rooms), days, slot)
+
+    return {
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "id_room": id_room,
+        "slot_minutes": slot,
+        "slots_per_day": busy.shape[2],
+        "days": [(date_from + timedelta(days=i)).isoformat() for i in range(days)],
+        # Una matriz por sala: "busy" tiene una fila por día, en el orden de "days"
+        "rooms": [
+            {"id_room": str(room) if room is not None else None, "busy": encode_rows(matrix)}
+            for room, matrix in zip(rooms, busy)
+        ],
+    }
@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from utils.metrics import registry, Gauge
+from utils.principal_cache import principal_cache, token_cache
+from utils.events import broker
+
+router = APIRouter(tags=["Metrics"])
+
+cache_lookups = registry.register(Gauge(
+    "auth_cache_lookups", "Aciertos y fallos de las cachés de autenticación", ("cache", "result"),
+))
+sse_subscribers = registry.register(Gauge(
+    "sse_subscribers", "Clientes conectados a GET /reservations/stream",
+))
+sse_evictions = registry.register(Gauge(
+    "sse_evictions", "Clientes SSE desconectados por no consumir eventos",
+))
+
+
+def collect_runtime_gauges() -> None:
+    for name, cache in (("principal", principal_cache), ("token", token_cache)):
+        cache_lookups.set(cache.hits, cache=name, result="hit")
+        cache_lookups.set(cache.misses, cache=name, result="miss")
+    sse_subscribers.set(broker.subscriber_count)
+    sse_evictions.set(broker.evictions)
+
+
+registry.add_collector(collect_runtime_gauges)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,14 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Request
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
-from datetime import datetime, time
-from typing import List
-from schemas.reservation_schema import ReservationCreate, ReservationUpdate, ReservationResponseModel
+from datetime import date, datetime, time, timedelta
+import asyncio
+from typing import List, Literal, Optional
+import csv
+import io
+import orjson
+from schemas.reservation_schema import (
+    ReservationCreate,
+    ReservationUpdate,
+    ReservationResponseModel,
+    ReservationBulkCreate,
+    ReservationBulkResponse,
+    ReservationConflict,
+)
+from schemas.page_schema import Page
+from schemas.batch_schema import BatchRequest, BatchResponse
+from utils.pagination import fetch_merged_page
+from utils.batch import parse_batch_ids
+from utils.serialization import (
+    negotiated_response,
+    RESERVATION_FIELDS,
+    fields_projection,
+    batch_to_json,
+    page_to_json,
+    parse_fields,
+    reservation_to_json,
+)
+from utils.versioning import bump_version, conditional_get
+from utils.events import broker, publish_reservation_event
+from config import settings
+from utils.occupancy import occupancy_key, claim_slot, release_slot, move_slot, find_conflicts
+from utils.archive import find_archived, find_many_archived, merge_sorted, reservation_collections
 from models.user_model import UserDBModel
-from database.connection import get_db
+from database.connection import get_db, get_read_db
+from database.repository import Repository
 from dependencies.dependencies import get_current_user
 
 router = APIRouter(prefix="/reservations", tags=["Reservations"])
 
+# Orden estable para la paginación por cursor
+RESERVATION_SORT_KEYS = ("select_date", "start_time", "_id")
+
+# Solo los campos que se devuelven en las respuestas
+RESERVATION_PROJECTION = {
+    "name_user": 1,
+    "name_event": 1,
+    "description": 1,
+    "select_date": 1,
+    "start_time": 1,
+    "end_time": 1,
+    "materia": 1,
+    "id_user": 1,
+    "id_room": 1,
+}
+
+
+def build_reservation_filter(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    id_user: Optional[str] = None,
+    materia: Optional[str] = None,
+    id_room: Optional[str] = None,
+) -> dict:
+    query = {}
+
+    if date_from or date_to:
+        if date_from and date_to and date_from > date_to:
+            raise HTTPException(status_code=400, detail="El rango de fechas es inválido.")
+        query["select_date"] = {}
+        if date_from:
+            query["select_date"]["$gte"] = datetime.combine(date_from, time.min)
+        if date_to:
+            query["select_date"]["$lte"] = datetime.combine(date_to, time.min)
+
+    if id_user:
+        if not ObjectId.is_valid(id_user):
+            raise HTTPException(status_code=400, detail="ID de usuario inválido")
+        query["id_user"] = ObjectId(id_user)
+
+    if materia:
+        query["materia"] = materia
+
+    if id_room:
+        if not ObjectId.is_valid(id_room):
+            raise HTTPException(status_code=400, detail="ID de sala inválido")
+        query["id_room"] = ObjectId(id_room)
+
+    return query
+
+
+async def get_bookable_room(db, id_room: str) -> dict:
+    # La sala debe existir y estar disponible para aceptar reservaciones
+    if not ObjectId.is_valid(id_room):
+        raise HTTPException(status_code=400, detail="ID de sala inválido")
+
+    room = await db["rooms"].find_one({"_id": ObjectId(id_room)}, {"availability": 1})
+    if not room:
+        raise HTTPException(status_code=404, detail="Sala no encontrada")
+    if not room.get("availability", True):
+        raise HTTPException(status_code=409, detail="La sala no está disponible para reservaciones.")
+    return room
+
+
+async def missing_or_forbidden(repo: Repository, oid: ObjectId, action: str) -> HTTPException:
+    # Solo en el camino de error: distinguir si no existe o si es de otro usuario
+    if await repo.exists({"_id": oid}):
+        return HTTPException(status_code=403, detail=f"No autorizado para {action} esta reservación")
+    if await find_archived(repo.collection.database, oid, {"_id": 1}):
+        return HTTPException(status_code=409, detail=f"La reservación está archivada, no se puede {action}")
+    return HTTPException(status_code=404, detail="Reservación no encontrada")
+
+
 def format_reservation_doc(doc: dict) -> ReservationResponseModel:
     select_date = doc.get("select_date")
     if isinstance(select_date, datetime):
@@ -33,6 +137,7 @@ def format_reservation_doc(doc: dict) -> ReservationResponseModel:
         end_time=extract_time(doc["end_time"]),
         materia=doc.get("materia"),
         id_user=str(doc.get("id_user")) if doc.get("id_user") else None,
+        id_room=str(doc.get("id_room")) if doc.get("id_room") else None,
     )
 
 @router.post("/", response_model=ReservationResponseModel, status_code=status.HTTP_201_CREATED)
@@ -47,18 +152,11 @@ async def create_reservation(
     if start_dt >= end_dt:
         raise HTTPException(status_code=400, detail="La hora de inicio debe ser menor que la hora de fin.")
 
-    # Verificar si hay traslape en la misma fecha
-    overlapping = await db["reservations"].find_one({
-        "select_date": datetime.combine(reservation.select_date, time.min),
-        "$or": [
-            {
-                "start_time": {"$lt": end_dt},
-                "end_time": {"$gt": start_dt}
-            }
-        ]
-    })
+    room = await get_bookable_room(db, reservation.id_room)
 
-    if overlapping:
+    # Apartar el horario en el documento de ocupación de la sala (atómico, sin carreras)
+    occupancy = occupancy_key(reservation.select_date, room["_id"])
+    if not await claim_slot(db, occupancy, start_dt, end_dt):
         raise HTTPException(
             status_code=409,
             detail="Ya existe una reservación en ese horario."
@@ -73,32 +171,359 @@ async def create_reservation(
         "select_date": datetime.combine(reservation.select_date, time.min),
         "materia": reservation.materia,
         "id_user": ObjectId(current_user.id_user),
+        "id_room": room["_id"],
         "created_at": datetime.utcnow()
     }
 
-    result = await db["reservations"].insert_one(new_reservation)
-    created = await db["reservations"].find_one({"_id": result.inserted_id})
+    try:
+        created = await Repository(db, "reservations").insert(new_reservation)
+    except Exception:
+        await release_slot(db, occupancy, start_dt, end_dt)
+        raise
+    await bump_version(db, "reservations")
+    publish_reservation_event("created", reservation_to_json(created))
 
     return format_reservation_doc(created)
 
-@router.get("/", response_model=List[ReservationResponseModel])
-async def get_reservations(db=Depends(get_db)):
-    reservations = []
-    cursor = db["reservations"].find()
-    async for res in cursor:
-        reservations.append(format_reservation_doc(res))
-    return reservations
+def expand_bulk_request(payload: ReservationBulkCreate) -> List[ReservationCreate]:
+    if payload.reservations:
+        occurrences = list(payload.reservations)
+    else:
+        step = timedelta(days=payload.recurrence.interval * (7 if payload.recurrence.freq == "weekly" else 1))
+        occurrences = []
+        current = payload.template.select_date
+        while current <= payload.recurrence.until:
+            occurrences.append(payload.template.model_copy(update={"select_date": current}))
+            current += step
+            if len(occurrences) > settings.BULK_MAX_RESERVATIONS:
+                break
+
+    if len(occurrences) > settings.BULK_MAX_RESERVATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No se pueden crear más de {settings.BULK_MAX_RESERVATIONS} reservaciones por petición.",
+        )
+    return occurrences
+
+
+@router.post("/bulk", response_model=ReservationBulkResponse, status_code=status.HTTP_201_CREATED)
+async def create_reservations_bulk(
+    payload: ReservationBulkCreate,
+    db=Depends(get_db),
+    current_user: UserDBModel = Depends(get_current_user)
+):
+    occurrences = expand_bulk_request(payload)
+
+    # Validar todas las salas con una sola consulta
+    room_ids = {r.id_room for r in occurrences}
+    if not all(ObjectId.is_valid(r) for r in room_ids):
+        raise HTTPException(status_code=400, detail="ID de sala inválido")
+    rooms = {
+        str(room["_id"]): room
+        async for room in db["rooms"].find({"_id": {"$in": [ObjectId(r) for r in room_ids]}}, {"availability": 1})
+    }
+
+    conflicts = {}
+    spans = []
+    for index, r in enumerate(occurrences):
+        start_dt = datetime.combine(r.select_date, r.start_time)
+        end_dt = datetime.combine(r.select_date, r.end_time)
+        room = rooms.get(r.id_room)
+        if start_dt >= end_dt:
+            conflicts[index] = "La hora de inicio debe ser menor que la hora de fin."
+        elif room is None:
+            conflicts[index] = "Sala no encontrada"
+        elif not room.get("availability", True):
+            conflicts[index] = "La sala no está disponible para reservaciones."
+        spans.append((occupancy_key(r.select_date, ObjectId(r.id_room)), start_dt, end_dt))
+
+    # Revisión previa de traslapes: una sola consulta para todo el lote
+    candidates = [i for i in range(len(spans)) if i not in conflicts]
+    overlaps = await find_conflicts(db, [spans[i] for i in candidates])
+    conflicts.update({candidates[j]: reason for j, reason in overlaps.items()})
+
+    def conflict_report():
+        return [
+            ReservationConflict(
+                index=i,
+                select_date=occurrences[i].select_date,
+                start_time=occurrences[i].start_time,
+                end_time=occurrences[i].end_time,
+                id_room=occurrences[i].id_room,
+                reason=reason,
+            )
+            for i, reason in sorted(conflicts.items())
+        ]
+
+    if conflicts and payload.all_or_nothing:
+        raise HTTPException(
+            status_code=409,
+            detail=[c.model_dump(mode="json") for c in conflict_report()],
+        )
+
+    # Apartar los horarios de forma atómica (otra petición pudo ganar alguno desde la revisión)
+    pending = [i for i in range(len(spans)) if i not in conflicts]
+    claimed = await asyncio.gather(*(claim_slot(db, *spans[i]) for i in pending))
+    won = [i for i, ok in zip(pending, claimed) if ok]
+    for i, ok in zip(pending, claimed):
+        if not ok:
+            conflicts[i] = "Ya existe una reservación en ese horario."
+
+    if conflicts and payload.all_or_nothing:
+        await asyncio.gather(*(release_slot(db, *spans[i]) for i in won))
+        raise HTTPException(
+            status_code=409,
+            detail=[c.model_dump(mode="json") for c in conflict_report()],
+        )
+
+    now = datetime.utcnow()
+    documents = [
+        {
+            "name_user": current_user.name,
+            "name_event": occurrences[i].name_event,
+            "description": occurrences[i].description,
+            "start_time": spans[i][1],
+            "end_time": spans[i][2],
+            "select_date": datetime.combine(occurrences[i].select_date, time.min),
+            "materia": occurrences[i].materia,
+            "id_user": ObjectId(current_user.id_user),
+            "id_room": ObjectId(occurrences[i].id_room),
+            "created_at": now,
+        }
+        for i in won
+    ]
+
+    if documents:
+        try:
+            await db["reservations"].insert_many(documents)
+        except Exception:
+            await asyncio.gather(*(release_slot(db, *spans[i]) for i in won))
+            raise
+        await bump_version(db, "reservations")
+        for doc in documents:
+            publish_reservation_event("created", reservation_to_json(doc))
+
+    # insert_many deja el _id en cada documento: no hace falta volver a leerlos
+    return ReservationBulkResponse(
+        created=[format_reservation_doc(doc) for doc in documents],
+        conflicts=conflict_report(),
+    )
+
+@router.get("/", response_model=Page[ReservationResponseModel])
+async def get_reservations(
+    request: Request,
+    date_from: Optional[date] = Query(None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Fecha final (inclusive)"),
+    id_user: Optional[str] = Query(None),
+    materia: Optional[str] = Query(None),
+    id_room: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, description="Tamaño de página (el servidor aplica un tope)"),
+    next: Optional[str] = Query(None, description="Cursor devuelto por la página anterior"),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (p. ej. name_event,select_date)"),
+    db=Depends(get_db)
+):
+    query = build_reservation_filter(date_from, date_to, id_user, materia, id_room)
+    selected = parse_fields(fields, RESERVATION_FIELDS)
+
+    not_modified, headers = await conditional_get(request, db, ["reservations"])
+    if not_modified:
+        return not_modified
+
+    # Las llaves del orden siempre se piden: el cursor siguiente se arma con ellas
+    projection = fields_projection(selected, RESERVATION_FIELDS, RESERVATION_PROJECTION, required=RESERVATION_SORT_KEYS)
+    # Si el rango llega a fechas archivadas también se leen esos periodos
+    collections = await reservation_collections(db, date_from, date_to)
+    docs, next_cursor = await fetch_merged_page(
+        collections, query, RESERVATION_SORT_KEYS,
+        limit=limit, cursor=next, projection=projection,
+    )
+    items = [reservation_to_json(doc, selected) for doc in docs]
+    return negotiated_response(request, page_to_json(items, next_cursor), headers=headers)
+
+@router.post("/batch", response_model=BatchResponse[ReservationResponseModel])
+async def get_reservations_batch(
+    request: Request,
+    payload: BatchRequest,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (p. ej. name_event,select_date)"),
+    db=Depends(get_db)
+):
+    # Varias reservaciones en una sola consulta $in, en el orden pedido
+    ids = parse_batch_ids(payload.ids)
+    selected = parse_fields(fields, RESERVATION_FIELDS)
+    projection = fields_projection(selected, RESERVATION_FIELDS, RESERVATION_PROJECTION, required=("_id",))
+    docs, missing = await Repository(db, "reservations").get_many(ids, projection)
+    if missing:
+        # Los que no están en la colección caliente pueden estar archivados
+        archived = await find_many_archived(db, missing, projection)
+        if archived:
+            found = {doc["_id"]: doc for doc in docs}
+            found.update(archived)
+            docs = [found[oid] for oid in ids if oid in found]
+            missing = [oid for oid in missing if oid not in archived]
+    return negotiated_response(request, batch_to_json([reservation_to_json(doc, selected) for doc in docs], missing))
+
+EXPORT_COLUMNS = [
+    "id_reservation", "name_user", "name_event", "description",
+    "select_date", "start_time", "end_time", "materia", "id_user", "id_room",
+]
+
+
+async def stream_reservations(cursor, export_format: str):
+    # Se serializa documento por documento: la memoria no depende del tamaño del rango
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        yield buffer.getvalue()
+
+    async for doc in cursor:
+        row = reservation_to_json(doc)
+        if export_format == "csv":
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(row)
+            yield buffer.getvalue()
+        else:
+            yield orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+
+
+@router.get("/export")
+async def export_reservations(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    date_from: Optional[date] = Query(None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Fecha final (inclusive)"),
+    id_user: Optional[str] = Query(None),
+    materia: Optional[str] = Query(None),
+    id_room: Optional[str] = Query(None),
+    db=Depends(get_read_db)  # tolera leer de un secundario
+):
+    query = build_reservation_filter(date_from, date_to, id_user, materia, id_room)
+    cursors = [
+        collection
+        .find(query, RESERVATION_PROJECTION)
+        .sort([(key, 1) for key in RESERVATION_SORT_KEYS])
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+        for collection in await reservation_collections(db, date_from, date_to)
+    ]
+    # Con periodos archivados se mezclan los cursores ya ordenados, sin cargarlos en memoria
+    cursor = cursors[0] if len(cursors) == 1 else merge_sorted(cursors, RESERVATION_SORT_KEYS)
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"reservations.{export_format}"
+    return StreamingResponse(
+        stream_reservations(cursor, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/stream")
+async def stream_reservation_events():
+    subscriber = broker.subscribe()
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Demasiadas conexiones de eventos abiertas")
+
+    return StreamingResponse(
+        broker.stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+CALENDAR_GROUP_FIELDS = {"id_user": "$id_user", "materia": "$materia"}
+
+
+def parse_month(month: str):
+    try:
+        first = datetime.strptime(month, "%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de mes inválido (esperado: YYYY-MM)")
+    following = datetime(first.year + first.month // 12, first.month % 12 + 1, 1)
+    return first, following
+
+
+@router.get("/calendar")
+async def get_calendar(
+    request: Request,
+    month: str = Query(..., description="Mes a resumir (YYYY-MM)"),
+    group_by: Optional[Literal["id_user", "materia"]] = Query(None),
+    id_room: Optional[str] = Query(None),
+    db=Depends(get_read_db)  # tolera leer de un secundario
+):
+    first, following = parse_month(month)
+    match = {"select_date": {"$gte": first, "$lt": following}}
+    if id_room:
+        match.update(build_reservation_filter(id_room=id_room))
+
+    not_modified, headers = await conditional_get(request, db, ["reservations"])
+    if not_modified:
+        return not_modified
+
+    group_id = {"day": "$select_date"}
+    if group_by:
+        group_id["key"] = CALENDAR_GROUP_FIELDS[group_by]
+
+    # El conteo y la suma de minutos se hacen en Mongo; aquí solo se acomoda el resultado
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": group_id,
+            "count": {"$sum": 1},
+            "ms": {"$sum": {"$subtract": ["$end_time", "$start_time"]}},
+        }},
+        {"$sort": {"_id.day": 1}},
+    ]
+
+    # El mes puede caer en un periodo archivado: se suman las filas de cada colección
+    rows = {}
+    for collection in await reservation_collections(db, first.date(), following.date()):
+        async for row in collection.aggregate(pipeline):
+            group = (row["_id"]["day"], row["_id"].get("key"))
+            count, ms = rows.get(group, (0, 0))
+            rows[group] = (count + row["count"], ms + row["ms"])
+
+    days = {}
+    for (day, key), (count, ms) in sorted(rows.items(), key=lambda item: item[0][0]):
+        day = day.date().isoformat()
+        summary = days.setdefault(day, {"date": day, "count": 0, "minutes": 0})
+        minutes = int(ms // 60000)
+        summary["count"] += count
+        summary["minutes"] += minutes
+        if group_by:
+            summary.setdefault("groups", []).append({
+                group_by: str(key) if key is not None else None,
+                "count": count,
+                "minutes": minutes,
+            })
+
+    return negotiated_response(request, {
+        "month": first.strftime("%Y-%m"),
+        "group_by": group_by,
+        "days": list(days.values()),
+    }, headers=headers)
 
 @router.get("/{id}", response_model=ReservationResponseModel)
-async def get_reservation(id: str, db=Depends(get_db)):
+async def get_reservation(
+    id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (p. ej. name_event,select_date)"),
+    db=Depends(get_db)
+):
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
+    selected = parse_fields(fields, RESERVATION_FIELDS)
 
-    reservation = await db["reservations"].find_one({"_id": ObjectId(id)})
+    not_modified, headers = await conditional_get(request, db, ["reservations"])
+    if not_modified:
+        return not_modified
+
+    projection = fields_projection(selected, RESERVATION_FIELDS, RESERVATION_PROJECTION)
+    reservation = await Repository(db, "reservations").get(ObjectId(id), projection)
+    if not reservation:
+        reservation = await find_archived(db, ObjectId(id), projection)
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservación no encontrada")
 
-    return format_reservation_doc(reservation)
+    return negotiated_response(request, reservation_to_json(reservation, selected), headers=headers)
 
 @router.put("/{reservation_id}", response_model=ReservationResponseModel)
 async def update_reservation(
@@ -110,17 +535,30 @@ async def update_reservation(
     if not ObjectId.is_valid(reservation_id):
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    existing = await db["reservations"].find_one({"_id": ObjectId(reservation_id)})
+    update_data = reservation.dict(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No hay datos para actualizar")
+
+    repo = Repository(db, "reservations")
+    oid = ObjectId(reservation_id)
+    owned = {"_id": oid, "id_user": ObjectId(current_user.id_user)}
+
+    # Si no cambia el horario ni la sala basta un solo viaje: el filtro ya verifica al propietario
+    if not update_data.keys() & {"select_date", "start_time", "end_time", "id_room"}:
+        updated = await repo.update(owned, update_data, RESERVATION_PROJECTION)
+        if not updated:
+            raise await missing_or_forbidden(repo, oid, "actualizar")
+        await bump_version(db, "reservations")
+        publish_reservation_event("updated", reservation_to_json(updated))
+        return format_reservation_doc(updated)
+
+    existing = await repo.get(oid)
     if not existing:
-        raise HTTPException(status_code=404, detail="Reservación no encontrada")
+        raise await missing_or_forbidden(repo, oid, "actualizar")
 
     if str(existing.get("id_user")) != str(current_user.id_user):
         raise HTTPException(status_code=403, detail="No autorizado para actualizar esta reservación")
 
-    update_data = reservation.dict(exclude_unset=True)
-    if not update_data:
-        raise HTTPException(status_code=400, detail="No hay datos para actualizar")
-
     # Extraemos valores actuales o nuevos
     select_date_raw = update_data.get("select_date", existing["select_date"])
     start_time_raw = update_data.get("start_time", existing["start_time"])
@@ -164,12 +602,37 @@ async def update_reservation(
     update_data["start_time"] = datetime.combine(select_date, start_time)
     update_data["end_time"] = datetime.combine(select_date, end_time)
 
-    await db["reservations"].update_one(
-        {"_id": ObjectId(reservation_id)},
-        {"$set": update_data}
+    if update_data["start_time"] >= update_data["end_time"]:
+        raise HTTPException(status_code=400, detail="La hora de inicio debe ser menor que la hora de fin.")
+
+    # Cambio de sala: validar la nueva
+    id_room = existing.get("id_room")
+    if "id_room" in update_data:
+        room = await get_bookable_room(db, update_data["id_room"])
+        id_room = update_data["id_room"] = room["_id"]
+
+    # Mover la ocupación si cambió el horario o la sala: se aparta lo nuevo antes de liberar lo anterior
+    old_key = occupancy_key(existing["select_date"].date(), existing.get("id_room"))
+    new_key = occupancy_key(select_date, id_room)
+    moved = (
+        old_key != new_key
+        or existing["start_time"] != update_data["start_time"]
+        or existing["end_time"] != update_data["end_time"]
     )
+    if moved and not await move_slot(
+        db, old_key, existing["start_time"], existing["end_time"],
+        new_key, update_data["start_time"], update_data["end_time"],
+    ):
+        raise HTTPException(status_code=409, detail="Ya existe una reservación en ese horario.")
 
-    updated = await db["reservations"].find_one({"_id": ObjectId(reservation_id)})
+    updated = await repo.update(owned, update_data, RESERVATION_PROJECTION)
+    if not updated:
+        # Se eliminó mientras tanto: devolver el horario apartado
+        if moved:
+            await release_slot(db, new_key, update_data["start_time"], update_data["end_time"])
+        raise HTTPException(status_code=404, detail="Reservación no encontrada")
+    await bump_version(db, "reservations")
+    publish_reservation_event("updated", reservation_to_json(updated))
     return format_reservation_doc(updated)
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -181,12 +644,19 @@ async def delete_reservation(
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    reservation = await db["reservations"].find_one({"_id": ObjectId(id)})
+    repo = Repository(db, "reservations")
+    oid = ObjectId(id)
+    reservation = await repo.delete(
+        {"_id": oid, "id_user": ObjectId(current_user.id_user)},
+        {"id_room": 1, "select_date": 1, "start_time": 1, "end_time": 1},
+    )
     if not reservation:
-        raise HTTPException(status_code=404, detail="Reservación no encontrada")
-
-    if str(reservation.get("id_user")) != str(current_user.id_user):
-        raise HTTPException(status_code=403, detail="No autorizado para eliminar esta reservación")
+        raise await missing_or_forbidden(repo, oid, "eliminar")
 
-    await db["reservations"].delete_one({"_id": ObjectId(id)})
+    await release_slot(
+        db, occupancy_key(reservation["select_date"].date(), reservation.get("id_room")),
+        reservation["start_time"], reservation["end_time"],
+    )
+    await bump_version(db, "reservations")
+    publish_reservation_event("deleted", {"id_reservation": id})
     return {"message": "Reservación eliminada exitosamente"}
@@ -1,10 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from bson import ObjectId
-from typing import List
+from typing import List, Optional
+from datetime import date
 
 from database.connection import get_db
+from database.repository import Repository
 from dependencies.dependencies import get_current_user
 from schemas.room_schema import RoomCreate, Room, RoomUpdate
+from schemas.page_schema import Page
+from schemas.batch_schema import BatchRequest, BatchResponse
+from schemas.reservation_schema import ReservationResponseModel
+from routers.reservation_router import (
+    RESERVATION_PROJECTION,
+    RESERVATION_SORT_KEYS,
+    build_reservation_filter,
+)
+from utils.serialization import (
+    negotiated_response,
+    RESERVATION_FIELDS,
+    ROOM_FIELDS,
+    fields_projection,
+    batch_to_json,
+    page_to_json,
+    parse_fields,
+    reservation_to_json,
+    room_to_json,
+)
+from utils.pagination import fetch_page, fetch_merged_page
+from utils.archive import reservation_collections
+from utils.batch import parse_batch_ids
+from utils.versioning import bump_version, conditional_get
 from models.user_model import UserPublicModel
 
 router = APIRouter(prefix="/rooms", tags=["Rooms"])
@@ -23,60 +48,131 @@ async def create_room(
     db=Depends(get_db),
     current_user: UserPublicModel = Depends(get_current_user)
 ):
-    new_room = room.dict()
-    result = await db["rooms"].insert_one(new_room)
-    new_room["_id"] = result.inserted_id
+    new_room = await Repository(db, "rooms").insert(room.dict())
+    await bump_version(db, "rooms")
     new_room = transform_room(new_room)
     return Room(**new_room)
 
 
-@router.get("/", response_model=List[Room])
-async def get_rooms(db=Depends(get_db)):
-    rooms = []
-    cursor = db["rooms"].find()
-    async for room in cursor:
-        rooms.append(Room(**transform_room(room)))
-    return rooms
+@router.get("/", response_model=Page[Room])
+async def get_rooms(
+    request: Request,
+    availability: Optional[bool] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, description="Tamaño de página (el servidor aplica un tope)"),
+    next: Optional[str] = Query(None, description="Cursor devuelto por la página anterior"),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (p. ej. name,availability)"),
+    db=Depends(get_db)
+):
+    query = {}
+    if availability is not None:
+        query["availability"] = availability
+    selected = parse_fields(fields, ROOM_FIELDS)
+
+    not_modified, headers = await conditional_get(request, db, ["rooms"])
+    if not_modified:
+        return not_modified
+
+    projection = fields_projection(selected, ROOM_FIELDS, required=("_id",))
+    docs, next_cursor = await fetch_page(db["rooms"], query, ("_id",), limit=limit, cursor=next, projection=projection)
+    items = [room_to_json(room, selected) for room in docs]
+    return negotiated_response(request, page_to_json(items, next_cursor), headers=headers)
+
+
+@router.post("/batch", response_model=BatchResponse[Room])
+async def get_rooms_batch(
+    request: Request,
+    payload: BatchRequest,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (p. ej. name,availability)"),
+    db=Depends(get_db)
+):
+    # Varias salas en una sola consulta $in, en el orden pedido
+    ids = parse_batch_ids(payload.ids)
+    selected = parse_fields(fields, ROOM_FIELDS)
+    docs, missing = await Repository(db, "rooms").get_many(ids, fields_projection(selected, ROOM_FIELDS, required=("_id",)))
+    return negotiated_response(request, batch_to_json([room_to_json(room, selected) for room in docs], missing))
 
 
 @router.get("/{id}", response_model=Room)
-async def get_room(id: str, db=Depends(get_db)):
+async def get_room(
+    id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (p. ej. name,availability)"),
+    db=Depends(get_db)
+):
     if not ObjectId.is_valid(id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="ID de sala inválido"
         )
+    selected = parse_fields(fields, ROOM_FIELDS)
 
-    room = await db["rooms"].find_one({"_id": ObjectId(id)})
+    not_modified, headers = await conditional_get(request, db, ["rooms"])
+    if not_modified:
+        return not_modified
+
+    room = await Repository(db, "rooms").get(ObjectId(id), fields_projection(selected, ROOM_FIELDS))
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Sala no encontrada"
         )
 
-    return Room(**transform_room(room))
+    return negotiated_response(request, room_to_json(room, selected), headers=headers)
 
 
-@router.put("/{id}", response_model=Room)
-async def update_room(
+@router.get("/{id}/reservations", response_model=Page[ReservationResponseModel])
+async def get_room_reservations(
+    request: Request,
     id: str,
-    room: RoomUpdate,
-    db=Depends(get_db),
-    current_user: UserPublicModel = Depends(get_current_user)
+    date_from: Optional[date] = Query(None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Fecha final (inclusive)"),
+    limit: Optional[int] = Query(None, ge=1, description="Tamaño de página (el servidor aplica un tope)"),
+    next: Optional[str] = Query(None, description="Cursor devuelto por la página anterior"),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (p. ej. name_event,select_date)"),
+    db=Depends(get_db)
 ):
     if not ObjectId.is_valid(id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="ID de sala inválido"
         )
+    selected = parse_fields(fields, RESERVATION_FIELDS)
 
-    existing_room = await db["rooms"].find_one({"_id": ObjectId(id)})
-    if not existing_room:
+    not_modified, headers = await conditional_get(request, db, ["rooms", "reservations"])
+    if not_modified:
+        return not_modified
+
+    if not await Repository(db, "rooms").exists({"_id": ObjectId(id)}):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Sala no encontrada"
         )
 
+    query = build_reservation_filter(date_from, date_to, id_room=id)
+    projection = fields_projection(selected, RESERVATION_FIELDS, RESERVATION_PROJECTION, required=RESERVATION_SORT_KEYS)
+    # Si el rango llega a fechas archivadas también se leen esos periodos
+    collections = await reservation_collections(db, date_from, date_to)
+    docs, next_cursor = await fetch_merged_page(
+        collections, query, RESERVATION_SORT_KEYS,
+        limit=limit, cursor=next, projection=projection,
+    )
+    items = [reservation_to_json(doc, selected) for doc in docs]
+    return negotiated_response(request, page_to_json(items, next_cursor), headers=headers)
+
+
+@router.put("/{id}", response_model=Room)
+async def update_room(
+    id: str,
+    room: RoomUpdate,
+    db=Depends(get_db),
+    current_user: UserPublicModel = Depends(get_current_user)
+):
+    if not ObjectId.is_valid(id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ID de sala inválido"
+        )
+
     update_data = room.dict(exclude_unset=True)
     if not update_data:
         raise HTTPException(
@@ -84,9 +180,14 @@ async def update_room(
             detail="No hay datos para actualizar"
         )
 
-    await db["rooms"].update_one({"_id": ObjectId(id)}, {"$set": update_data})
+    updated_room = await Repository(db, "rooms").update({"_id": ObjectId(id)}, update_data)
+    if not updated_room:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sala no encontrada"
+        )
 
-    updated_room = await db["rooms"].find_one({"_id": ObjectId(id)})
+    await bump_version(db, "rooms")
     return Room(**transform_room(updated_room))
 
 
@@ -102,12 +203,12 @@ async def delete_room(
             detail="ID de sala inválido"
         )
 
-    room = await db["rooms"].find_one({"_id": ObjectId(id)})
+    room = await Repository(db, "rooms").delete({"_id": ObjectId(id)}, {"_id": 1})
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Sala no encontrada"
         )
 
-    await db["rooms"].delete_one({"_id": ObjectId(id)})
+    await bump_version(db, "rooms")
     return None  # 204 No Content, sin cuerpo
\ No newline at end of file
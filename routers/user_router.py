@@ -1,71 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from jose import JWTError, jwt
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from typing import Optional
 from schemas.user_schema import UserCreate, User, UserUpdate
 from models.user_model import UserDBModel, UserPublicModel
-from utils.auth_utils import hash_password
-from database.connection import get_db, db
+from utils.auth_utils import hash_password_async
+from utils.admission import check_auth_rate_limits
+from database.connection import get_db
+from database.repository import Repository
 from bson import ObjectId, errors
 from dependencies.dependencies import get_current_user
 from motor.motor_asyncio import AsyncIOMotorClient
-from routers.auth_router import SECRET_KEY, ALGORITHM
-from dependencies.dependencies import oauth2_scheme
+from pymongo.errors import DuplicateKeyError
+from schemas.page_schema import Page
+from schemas.batch_schema import BatchRequest, BatchResponse
+from utils.pagination import fetch_page
+from utils.serialization import (
+    negotiated_response,
+    USER_FIELDS,
+    batch_to_json,
+    fields_projection,
+    page_to_json,
+    parse_fields,
+    user_to_json,
+)
+from utils.batch import parse_batch_ids
+from utils.principal_cache import principal_cache, token_cache
+from utils.refresh_tokens import revoke_user_refresh_tokens
 
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+# Nunca leer la contraseña para armar respuestas
+USER_PROJECTION = {"name": 1, "email": 1}
+
 
 # Transforma documento Mongo a dict compatible con Pydantic
 def mongo_to_user(doc) -> dict:
     doc = dict(doc)
-    doc["id"] = str(doc["_id"])
-    del doc["_id"]
+    doc["_id"] = str(doc["_id"])
     return doc
 
 @router.get("/user/me", response_model=UserPublicModel)
-async def get_me(token: str = Depends(oauth2_scheme), db=Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Token inválido o no proporcionado",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user_data = await db["users"].find_one({"_id": ObjectId(user_id)})
-    if not user_data:
-        raise credentials_exception
-
-    return UserPublicModel(**user_data)
-
-
-#@router.get("/user/me", response_model=User)
-#async def get_me(current_user: User = Depends(get_current_user)):
-#    return current_user
+async def get_me(current_user: UserPublicModel = Depends(get_current_user)):
+    # Misma validación que el resto de endpoints: firma, tipo de token y revocación (logout)
+    return current_user
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-async def register_user(user: UserCreate):
+async def register_user(request: Request, user: UserCreate, db=Depends(get_db)):
+    check_auth_rate_limits(request, user.email)
+
     # Verificar si ya existe un usuario con el mismo correo
     try:
-        existing_user = await db["users"].find_one({"email": user.email})
+        existing_user = await db["users"].find_one({"email": user.email}, {"_id": 1})
     except Exception as e:
         print(f"DB Error: {e}")
         raise HTTPException(status_code=400, detail="Database error")
-    
+
+    if existing_user:
+        raise HTTPException(status_code=400, detail="El correo ya está registrado")
+
     # Hashear la contraseña
     user_dict = user.dict()
-    user_dict["password"] = hash_password(user.password)
+    user_dict["password"] = await hash_password_async(user.password)
 
-    # Insertar el nuevo usuario
-    await db["users"].insert_one(user_dict)
+    # Insertar el nuevo usuario (el índice único en email cubre registros simultáneos)
+    try:
+        await Repository(db, "users").insert(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="El correo ya está registrado")
 
-    return {"message": "User registered successfully"}  
-HTTPException(status_code=400, detail="El correo ya está registrado")
+    return {"message": "User registered successfully"}
 
     
 #@router.get("/check")
@@ -74,21 +77,52 @@ HTTPException(status_code=400, detail="El correo ya está registrado")
 #    return {"type": str(type(db))}
 
 
-@router.get("/", response_model=list[User])
+@router.get("/", response_model=Page[User])
 async def get_users(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, description="Tamaño de página (el servidor aplica un tope)"),
+    next: Optional[str] = Query(None, description="Cursor devuelto por la página anterior"),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (p. ej. name,email)"),
+    db=Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    selected = parse_fields(fields, USER_FIELDS)
+    docs, next_cursor = await fetch_page(
+        db["users"], {}, ("_id",),
+        limit=limit, cursor=next, projection=fields_projection(selected, USER_FIELDS, USER_PROJECTION),
+    )
+    return negotiated_response(request, page_to_json([user_to_json(doc, selected) for doc in docs], next_cursor))
+
+
+@router.post("/batch", response_model=BatchResponse[User])
+async def get_users_batch(
+    request: Request,
+    payload: BatchRequest,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (p. ej. name,email)"),
     db=Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    users = []
-    cursor = db["users"].find()
-    async for doc in cursor:
-        users.append(User(**mongo_to_user(doc)))
-    return users
+    # Varios usuarios en una sola consulta $in, en el orden pedido
+    ids = parse_batch_ids(payload.ids)
+    selected = parse_fields(fields, USER_FIELDS)
+    docs, missing = await Repository(db, "users").get_many(ids, fields_projection(selected, USER_FIELDS, USER_PROJECTION, required=("_id",)))
+    return negotiated_response(request, batch_to_json([user_to_json(doc, selected) for doc in docs], missing))
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(current_user: User = Depends(get_current_user)):
+    # Contadores para dimensionar las cachés de autenticación
+    return {
+        "principal_cache": principal_cache.stats(),
+        "token_cache": token_cache.stats(),
+    }
 
 
 @router.get("/{id}", response_model=User)
 async def get_user(
+    request: Request,
     id: str,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (p. ej. name,email)"),
     db=Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -97,11 +131,12 @@ async def get_user(
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    user = await db["users"].find_one({"_id": oid})
+    selected = parse_fields(fields, USER_FIELDS)
+    user = await Repository(db, "users").get(oid, fields_projection(selected, USER_FIELDS, USER_PROJECTION))
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
-    return User(**mongo_to_user(user))
+    return negotiated_response(request, user_to_json(user, selected))
 
 
 @router.put("/{id}", response_model=User)
@@ -119,17 +154,22 @@ async def update_user(
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    existing = await db["users"].find_one({"_id": oid})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-
+    repo = Repository(db, "users")
     update_data = user_data.dict(exclude_unset=True)
     if update_data:
         if "password" in update_data:
-            update_data["password"] = hash_password(update_data["password"])
-        await db["users"].update_one({"_id": oid}, {"$set": update_data})
+            update_data["password"] = await hash_password_async(update_data["password"])
+        try:
+            updated_user = await repo.update({"_id": oid}, update_data, USER_PROJECTION)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="El correo ya está registrado")
+        principal_cache.invalidate(id)
+    else:
+        updated_user = await repo.get(oid, USER_PROJECTION)
+
+    if not updated_user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
-    updated_user = await db["users"].find_one({"_id": oid})
     return User(**mongo_to_user(updated_user))
 
 
@@ -147,9 +187,10 @@ async def delete_user(
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    existing = await db["users"].find_one({"_id": oid})
-    if not existing:
+    deleted = await Repository(db, "users").delete({"_id": oid}, {"_id": 1})
+    principal_cache.invalidate(id)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    await revoke_user_refresh_tokens(db, id)
 
-    await db["users"].delete_one({"_id": oid})
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Generic, List, TypeVar
+from config import settings
+
+T = TypeVar("T")
+
+# Ids a resolver en una sola petición (POST /rooms/batch, /users/batch, /reservations/batch)
+class BatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=settings.BATCH_MAX_IDS)
+
+# Los encontrados en el orden pedido y los que no existen
+class BatchResponse(BaseModel, Generic[T]):
+    items: List[T]
+    missing: List[str] = []
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Respuesta paginada: los elementos de la página y el cursor para pedir la siguiente
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next: Optional[str] = None
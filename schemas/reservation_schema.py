@@ -1,23 +1,8 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
 from datetime import date, time
 from bson import ObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("ID inválido")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
 class ReservationBase(BaseModel):
     name_event: str = Field(..., max_length=100)
     description: str = Field(..., max_length=300)
@@ -27,7 +12,30 @@ class ReservationBase(BaseModel):
     materia: Optional[str] = None
 
 class ReservationCreate(ReservationBase):
-    pass
+    id_room: str
+
+class RecurrenceRule(BaseModel):
+    freq: Literal["daily", "weekly"]
+    until: date
+    interval: int = Field(1, ge=1)
+
+class ReservationBulkCreate(BaseModel):
+    # O una lista explícita, o una plantilla (su select_date es la primera ocurrencia) + recurrencia
+    reservations: Optional[List[ReservationCreate]] = None
+    template: Optional[ReservationCreate] = None
+    recurrence: Optional[RecurrenceRule] = None
+    all_or_nothing: bool = True
+
+    @model_validator(mode="after")
+    def check_source(self):
+        from_template = self.template is not None or self.recurrence is not None
+        if bool(self.reservations) == from_template:
+            raise ValueError("Envía 'reservations' o bien 'template' con 'recurrence'")
+        if from_template and not (self.template and self.recurrence):
+            raise ValueError("'template' y 'recurrence' van juntos")
+        if self.template and self.recurrence and self.recurrence.until < self.template.select_date:
+            raise ValueError("'until' debe ser posterior a la fecha de la plantilla")
+        return self
 
 class ReservationUpdate(BaseModel):
     name_event: Optional[str] = Field(None, max_length=100)
@@ -36,11 +44,13 @@ class ReservationUpdate(BaseModel):
     start_time: Optional[str] = None
     end_time: Optional[str] = None
     materia: Optional[str] = None
+    id_room: Optional[str] = None
 
 class ReservationResponseModel(ReservationBase):
     id_reservation: str = Field(..., alias="id_reservation")
     name_user: str
     id_user: Optional[str] = None
+    id_room: Optional[str] = None  # las reservaciones anteriores a las salas no la tienen
 
     class Config:
         validate_by_name = True
@@ -49,3 +59,15 @@ class ReservationResponseModel(ReservationBase):
             date: lambda v: v.isoformat(),
             time: lambda v: v.isoformat()
         }
+
+class ReservationConflict(BaseModel):
+    index: int
+    select_date: date
+    start_time: time
+    end_time: time
+    id_room: str
+    reason: str
+
+class ReservationBulkResponse(BaseModel):
+    created: List[ReservationResponseModel]
+    conflicts: List[ReservationConflict]
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional
 from bson import ObjectId
-from models.room_model import PyObjectId  # Importamos PyObjectId para id
+from models.object_id import PyObjectId  # Importamos PyObjectId para id
 
 class RoomCreate(BaseModel):
     name: str
@@ -0,0 +1,125 @@
+# utils/admission.py
+#
+# Control de admisión para login y registro (el trabajo caro es bcrypt).
+#
+# - Límites por token bucket por correo y por IP; las claves viven en un OrderedDict con
+#   tope de tamaño (se descartan las menos recientes), así una ráfaga de correos inventados
+#   no crece la memoria sin límite.
+# - Un semáforo con tantos permisos como hilos de bcrypt y una cola de espera acotada:
+#   si la cola está llena o la espera pasa del máximo, se responde 429 de inmediato.
+
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from config import settings
+from utils.metrics import registry, Counter
+
+admission_rejections = registry.register(Counter(
+    "auth_admission_rejections_total", "Peticiones de auth rechazadas con 429", ("reason",),
+))
+
+
+def too_many_requests(retry_after: float, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class TokenBucketLimiter:
+    """`rate` fichas por segundo hasta `burst`, una cubeta por clave."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def acquire(self, key: str) -> float:
+        """Consume una ficha. Devuelve 0 si se admite o los segundos a esperar si no."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class HashAdmission:
+    """Semáforo para el trabajo de bcrypt con cola de espera acotada."""
+
+    def __init__(self, concurrency: int, max_waiting: int, max_wait: float):
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._concurrency = concurrency
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            admission_rejections.inc(reason="queue_full")
+            raise too_many_requests(self.max_wait, "Demasiadas solicitudes de autenticación, intenta más tarde")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            admission_rejections.inc(reason="queue_timeout")
+            raise too_many_requests(self.max_wait, "Demasiadas solicitudes de autenticación, intenta más tarde")
+        finally:
+            self.waiting -= 1
+
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+
+email_limiter = TokenBucketLimiter(
+    rate=settings.AUTH_RATE_PER_EMAIL_PER_MINUTE / 60,
+    burst=settings.AUTH_BURST_PER_EMAIL,
+    max_keys=settings.AUTH_RATE_LIMIT_MAX_KEYS,
+)
+ip_limiter = TokenBucketLimiter(
+    rate=settings.AUTH_RATE_PER_IP_PER_MINUTE / 60,
+    burst=settings.AUTH_BURST_PER_IP,
+    max_keys=settings.AUTH_RATE_LIMIT_MAX_KEYS,
+)
+hash_admission = HashAdmission(
+    concurrency=settings.PASSWORD_HASH_WORKERS,
+    max_waiting=settings.AUTH_HASH_MAX_WAITING,
+    max_wait=settings.AUTH_HASH_MAX_WAIT_SECONDS,
+)
+
+
+def check_auth_rate_limits(request: Request, email: str) -> None:
+    """429 si la IP o el correo ya gastaron su cubeta. Se llama antes de tocar Mongo o bcrypt."""
+    client_ip = request.client.host if request.client else "unknown"
+    for reason, limiter, key in (("ip", ip_limiter, client_ip), ("email", email_limiter, email.strip().lower())):
+        wait = limiter.acquire(key)
+        if wait:
+            admission_rejections.inc(reason=reason)
+            raise too_many_requests(wait, "Demasiados intentos, espera antes de volver a intentar")
@@ -0,0 +1,300 @@
+# utils/archive.py
+#
+# Archivo frío de reservaciones. Las reservaciones con fecha anterior al horizonte
+# (ARCHIVE_HORIZON_DAYS) se mueven de `reservations` a una colección por periodo
+# (`reservations_archive_2025_1`, `..._2025_2`, según ARCHIVE_TERM_MONTHS), así la
+# colección caliente y sus índices se quedan chicos.
+#
+# Cada pasada trabaja por lotes: inserta el lote en el archivo (los duplicados se
+# ignoran) y después lo borra de `reservations`. Antes del primer borrado tras publicar
+# un límite o periodo nuevo se espera ARCHIVE_STATE_TTL_SECONDS, lo que dura la caché
+# del estado en cada worker. Si el proceso muere a la mitad, la
+# siguiente pasada retoma donde quedó sin perder ni duplicar nada. Mientras un lote está
+# en las dos colecciones, las lecturas paginadas lo deduplican por _id.
+#
+# El estado vive en `archive_state`: `archived_before` (todo lo anterior puede estar en
+# el archivo), los periodos existentes y un lease para que solo un worker haga la pasada.
+# Los documentos de ocupación no se tocan: las horas archivadas siguen apartadas.
+#
+#   python -m utils.archive run        # una pasada ahora
+#   python -m utils.archive status     # estado y periodos archivados
+
+import asyncio
+import logging
+import time as _time
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional, Sequence
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+HOT_COLLECTION = "reservations"
+ARCHIVE_PREFIX = "reservations_archive_"
+ARCHIVE_STATE_COLLECTION = "archive_state"
+STATE_ID = "reservations"
+DUPLICATE_KEY = 11000
+
+
+def term_name(day: date) -> str:
+    term = (day.month - 1) // settings.ARCHIVE_TERM_MONTHS + 1
+    return f"{day.year}_{term}"
+
+
+def term_bounds(name: str):
+    """(inicio, fin exclusivo) del periodo como datetimes a medianoche."""
+    year, term = (int(part) for part in name.split("_"))
+    first_month = (term - 1) * settings.ARCHIVE_TERM_MONTHS + 1
+    start = datetime(year, first_month, 1)
+    last_month = first_month + settings.ARCHIVE_TERM_MONTHS
+    end = datetime(year + (last_month - 1) // 12, (last_month - 1) % 12 + 1, 1)
+    return start, end
+
+
+def archive_collection_name(term: str) -> str:
+    return f"{ARCHIVE_PREFIX}{term}"
+
+
+# El estado se consulta en cada lectura; se guarda unos segundos en memoria
+_state_cache = {"value": None, "at": 0.0}
+
+
+async def get_archive_state(db) -> dict:
+    now = _time.monotonic()
+    if _state_cache["value"] is not None and now - _state_cache["at"] < settings.ARCHIVE_STATE_TTL_SECONDS:
+        return _state_cache["value"]
+    state = await db[ARCHIVE_STATE_COLLECTION].find_one({"_id": STATE_ID}, {"archived_before": 1, "terms": 1})
+    state = state or {"archived_before": None, "terms": []}
+    _state_cache.update(value=state, at=now)
+    return state
+
+
+def _invalidate_state() -> None:
+    _state_cache.update(value=None, at=0.0)
+
+
+async def reservation_collections(db, date_from: Optional[date] = None, date_to: Optional[date] = None) -> list:
+    """Colecciones que hay que leer para el rango [date_from, date_to] (la caliente siempre va)."""
+    state = await get_archive_state(db)
+    archived_before = state.get("archived_before")
+    collections = []
+    if archived_before is not None and (date_from is None or datetime.combine(date_from, time.min) < archived_before):
+        for term in sorted(state.get("terms", [])):
+            start, end = term_bounds(term)
+            if date_from is not None and end <= datetime.combine(date_from, time.min):
+                continue
+            if date_to is not None and start > datetime.combine(date_to, time.min):
+                continue
+            collections.append(db[archive_collection_name(term)])
+    collections.append(db[HOT_COLLECTION])
+    return collections
+
+
+async def find_archived(db, oid, projection: Optional[dict] = None) -> Optional[dict]:
+    """Busca una reservación por _id en los periodos archivados."""
+    state = await get_archive_state(db)
+    terms = state.get("terms", [])
+    if not terms:
+        return None
+    found = await asyncio.gather(*(
+        db[archive_collection_name(term)].find_one({"_id": oid}, projection) for term in terms
+    ))
+    return next((doc for doc in found if doc is not None), None)
+
+
+async def find_many_archived(db, ids: Sequence, projection: Optional[dict] = None) -> dict:
+    state = await get_archive_state(db)
+    found = {}
+    for term in state.get("terms", []):
+        async for doc in db[archive_collection_name(term)].find({"_id": {"$in": list(ids)}}, projection):
+            found[doc["_id"]] = doc
+    return found
+
+
+async def merge_sorted(cursors: List, keys: Sequence[str]):
+    """Mezcla cursores ya ordenados por `keys` en un solo flujo ordenado, sin _id repetidos."""
+    def sort_key(doc):
+        return tuple(doc.get(key) for key in keys)
+
+    heads = []
+    for cursor in cursors:
+        try:
+            doc = await cursor.__anext__()
+        except StopAsyncIteration:
+            continue
+        heads.append([doc, cursor])
+
+    last_id = None
+    while heads:
+        index = min(range(len(heads)), key=lambda i: sort_key(heads[i][0]))
+        doc, cursor = heads[index]
+        if doc["_id"] != last_id:
+            last_id = doc["_id"]
+            yield doc
+        try:
+            heads[index][0] = await cursor.__anext__()
+        except StopAsyncIteration:
+            heads.pop(index)
+
+
+async def _acquire_lease(db) -> bool:
+    now = datetime.now(timezone.utc)
+    try:
+        await db[ARCHIVE_STATE_COLLECTION].find_one_and_update(
+            {"_id": STATE_ID, "$or": [{"lease_until": {"$lt": now}}, {"lease_until": None}]},
+            {"$set": {"lease_until": now + timedelta(seconds=settings.ARCHIVE_LEASE_SECONDS)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return True
+    except DuplicateKeyError:
+        # Otro worker tiene el lease (el filtro no coincidió y el upsert chocó con el _id)
+        return False
+
+
+async def _extend_lease(db) -> None:
+    await db[ARCHIVE_STATE_COLLECTION].update_one(
+        {"_id": STATE_ID},
+        {"$set": {"lease_until": datetime.now(timezone.utc) + timedelta(seconds=settings.ARCHIVE_LEASE_SECONDS)}},
+    )
+
+
+async def _release_lease(db) -> None:
+    await db[ARCHIVE_STATE_COLLECTION].update_one({"_id": STATE_ID}, {"$set": {"lease_until": None}})
+
+
+async def _wait_for_readers(published_at: datetime) -> None:
+    # Mongo devuelve fechas UTC sin tz
+    if published_at.tzinfo is None:
+        published_at = published_at.replace(tzinfo=timezone.utc)
+    ready_at = published_at + timedelta(seconds=settings.ARCHIVE_STATE_TTL_SECONDS)
+    wait = (ready_at - datetime.now(timezone.utc)).total_seconds()
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+
+async def _insert_ignoring_duplicates(collection, docs: List[dict]) -> None:
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as exc:
+        # Reintento de un lote que ya se había copiado: solo se aceptan duplicados
+        if any(error.get("code") != DUPLICATE_KEY for error in exc.details.get("writeErrors", [])):
+            raise
+
+
+async def archive_pass(db, today: Optional[date] = None, batch_size: Optional[int] = None) -> int:
+    """Mueve al archivo las reservaciones anteriores al horizonte. Devuelve cuántas movió."""
+    from database.indexes import INDEXES, sync_indexes
+    from utils.versioning import bump_version
+
+    if not await _acquire_lease(db):
+        return 0
+
+    today = today or date.today()
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = datetime.combine(today - timedelta(days=settings.ARCHIVE_HORIZON_DAYS), time.min)
+    hot = db[HOT_COLLECTION]
+    moved = 0
+    indexed_terms = set()
+
+    try:
+        # Primero se anuncia el nuevo límite; los demás workers lo ven cuando vence su caché
+        await db[ARCHIVE_STATE_COLLECTION].update_one(
+            {"_id": STATE_ID, "$or": [{"archived_before": {"$lt": cutoff}}, {"archived_before": None}]},
+            {"$set": {"archived_before": cutoff, "published_at": datetime.now(timezone.utc)}},
+        )
+        _invalidate_state()
+        # Se lee de Mongo y no se recuerda en memoria: una pasada que retoma a otra que murió
+        # justo después de publicar también tiene que esperar
+        state = await db[ARCHIVE_STATE_COLLECTION].find_one({"_id": STATE_ID}, {"published_at": 1})
+        published_at = state.get("published_at")
+
+        while True:
+            batch = await (
+                hot.find({"select_date": {"$lt": cutoff}})
+                .sort([("select_date", 1), ("_id", 1)])
+                .limit(batch_size)
+                .to_list(length=batch_size)
+            )
+            if not batch:
+                break
+
+            by_term = {}
+            for doc in batch:
+                by_term.setdefault(term_name(doc["select_date"].date()), []).append(doc)
+
+            for term, docs in by_term.items():
+                collection = db[archive_collection_name(term)]
+                if term not in indexed_terms:
+                    # Mismos índices que la colección caliente para que las lecturas no cambien de plan
+                    await sync_indexes(collection, INDEXES[HOT_COLLECTION])
+                    result = await db[ARCHIVE_STATE_COLLECTION].update_one(
+                        {"_id": STATE_ID, "terms": {"$ne": term}},
+                        {"$push": {"terms": term}, "$set": {"published_at": datetime.now(timezone.utc)}},
+                    )
+                    if result.modified_count:
+                        published_at = datetime.now(timezone.utc)
+                    indexed_terms.add(term)
+                    _invalidate_state()
+                await _insert_ignoring_duplicates(collection, docs)
+
+            # No borrar de la caliente hasta que ningún worker pueda tener un estado viejo en
+            # caché: si no, sus lecturas no buscarían en el periodo y perderían documentos
+            if published_at is not None:
+                await _wait_for_readers(published_at)
+                published_at = None
+            await hot.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+            moved += len(batch)
+            await db[ARCHIVE_STATE_COLLECTION].update_one(
+                {"_id": STATE_ID},
+                {"$set": {"last_pass_at": datetime.now(timezone.utc)}, "$inc": {"archived_count": len(batch)}},
+            )
+            # Que los demás workers no pierdan el lease en pasadas largas
+            await _extend_lease(db)
+    finally:
+        await _release_lease(db)
+
+    if moved:
+        await bump_version(db, HOT_COLLECTION)
+        logger.info("Archivo: %s reservaciones movidas (anteriores a %s)", moved, cutoff.date())
+    return moved
+
+
+async def run_archiver(db) -> None:
+    """Tarea de fondo del lifespan: una pasada cada ARCHIVE_INTERVAL_SECONDS."""
+    while True:
+        try:
+            await archive_pass(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Falló la pasada de archivo: %s", exc)
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL_SECONDS)
+
+
+async def _main(command: str) -> None:
+    from database import connection
+
+    db = await connection.connect()
+    try:
+        if command == "run":
+            moved = await archive_pass(db)
+            print(f"Reservaciones archivadas: {moved}")
+        state = await db[ARCHIVE_STATE_COLLECTION].find_one({"_id": STATE_ID}) or {}
+        print(f"archived_before: {state.get('archived_before')}")
+        for term in sorted(state.get("terms", [])):
+            count = await db[archive_collection_name(term)].estimated_document_count()
+            print(f"  {archive_collection_name(term)}: {count}")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] not in (["run"], ["status"]):
+        raise SystemExit("Uso: python -m utils.archive run|status")
+    asyncio.run(_main(sys.argv[1]))
@@ -1,12 +1,146 @@
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 from passlib.context import CryptContext
+from config import settings
+from utils.metrics import password_hash_duration
+from utils.admission import hash_admission
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+MIN_BCRYPT_ROUNDS = 4
+MAX_BCRYPT_ROUNDS = 18
+
+
+def _rounds_policy(rounds: int) -> dict:
+    # min = max = rounds: cualquier hash con otro costo (más alto o más bajo) se rehashea en el login
+    return {
+        "bcrypt__default_rounds": rounds,
+        "bcrypt__min_rounds": rounds,
+        "bcrypt__max_rounds": rounds,
+    }
+
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", **_rounds_policy(settings.BCRYPT_ROUNDS))
+
+
+def set_bcrypt_rounds(rounds: int) -> None:
+    pwd_context.update(**_rounds_policy(rounds))
+
+
+def measure_hash_ms(rounds: int, samples: int = 3) -> float:
+    """Mediana en ms de un bcrypt con `rounds` en este equipo."""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash("calibration-password")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate_rounds(target_ms: float, samples: int = 3) -> Tuple[int, float]:
+    """Rounds cuyo tiempo de hash queda más cerca de `target_ms`. Devuelve (rounds, ms medidos).
+
+    Cada round extra duplica el costo, así que basta subir uno por uno hasta pasarse.
+    """
+    best = (MIN_BCRYPT_ROUNDS, measure_hash_ms(MIN_BCRYPT_ROUNDS, samples))
+    for rounds in range(MIN_BCRYPT_ROUNDS + 1, MAX_BCRYPT_ROUNDS + 1):
+        elapsed = measure_hash_ms(rounds, samples)
+        if abs(elapsed - target_ms) < abs(best[1] - target_ms):
+            best = (rounds, elapsed)
+        if elapsed >= target_ms:
+            break
+    return best
+
+
+def check_bcrypt_cost() -> None:
+    """Revisión opcional al arrancar (BCRYPT_STARTUP_CHECK): "warn" solo avisa, "apply" ajusta el costo."""
+    rounds, elapsed = calibrate_rounds(settings.BCRYPT_TARGET_MS)
+    if rounds == settings.BCRYPT_ROUNDS:
+        logger.info("bcrypt: %s rounds ~ %.0f ms en este equipo", rounds, elapsed)
+        return
+    if settings.BCRYPT_STARTUP_CHECK == "apply":
+        set_bcrypt_rounds(rounds)
+        logger.warning(
+            "bcrypt: usando %s rounds (~%.0f ms) en lugar de BCRYPT_ROUNDS=%s",
+            rounds, elapsed, settings.BCRYPT_ROUNDS,
+        )
+    else:
+        logger.warning(
+            "bcrypt: BCRYPT_ROUNDS=%s no cumple el objetivo de %.0f ms; en este equipo conviene %s (~%.0f ms)",
+            settings.BCRYPT_ROUNDS, settings.BCRYPT_TARGET_MS, rounds, elapsed,
+        )
+
+# bcrypt suelta el GIL, así que un pool de hilos basta para sacar el hash del event loop
+_hash_executor = None
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="bcrypt",
+        )
+    return _hash_executor
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    start = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        password_hash_duration.observe(time.perf_counter() - start, operation="hash")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
+    start = time.perf_counter()
     try:
         return pwd_context.verify(plain_password, hashed_password)
     except Exception:
         return False
+    finally:
+        password_hash_duration.observe(time.perf_counter() - start, operation="verify")
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    # Si el hash tiene otro costo que el configurado, passlib devuelve el hash nuevo
+    start = time.perf_counter()
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception:
+        return False, None
+    finally:
+        password_hash_duration.observe(time.perf_counter() - start, operation="verify")
+
+# Todas pasan por hash_admission: si no hay hilo libre a tiempo, 429 en lugar de encolar sin fin
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    async with hash_admission.slot():
+        return await loop.run_in_executor(_get_hash_executor(), hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    async with hash_admission.slot():
+        return await loop.run_in_executor(_get_hash_executor(), verify_password, plain_password, hashed_password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    loop = asyncio.get_running_loop()
+    async with hash_admission.slot():
+        return await loop.run_in_executor(_get_hash_executor(), verify_and_update, plain_password, hashed_password)
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibra el costo de bcrypt para este equipo")
+    parser.add_argument("--target-ms", type=float, default=settings.BCRYPT_TARGET_MS, help="Latencia objetivo por hash")
+    parser.add_argument("--samples", type=int, default=3, help="Mediciones por valor de rounds")
+    args = parser.parse_args()
+    rounds, elapsed = calibrate_rounds(args.target_ms, args.samples)
+    print(f"BCRYPT_ROUNDS={rounds}  # ~{elapsed:.0f} ms por hash (objetivo {args.target_ms:.0f} ms)")
@@ -0,0 +1,16 @@
+# utils/batch.py
+#
+# Validación de ids para los endpoints POST /.../batch: una sola pasada, sin duplicados
+# y conservando el orden en que los pidió el cliente.
+
+from typing import List
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+
+def parse_batch_ids(ids: List[str]) -> List[ObjectId]:
+    invalid = [id for id in ids if not ObjectId.is_valid(id)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"IDs inválidos: {', '.join(invalid[:20])}")
+    return list(dict.fromkeys(ObjectId(id) for id in ids))
@@ -0,0 +1,193 @@
+# utils/compression.py
+#
+# Middleware ASGI de compresión (zstd, brotli o gzip según Accept-Encoding).
+#
+# - Respuestas de un solo bloque: se comprimen solo si pasan de `minimum_size` bytes.
+# - Respuestas en streaming (export NDJSON/CSV): cada bloque se comprime y se vacía al
+#   momento (flush), así el cliente sigue recibiendo datos mientras el servidor los genera.
+# - SSE y tipos que no son texto/JSON/msgpack pasan sin tocar.
+#
+# brotli y zstandard son opcionales: si no están instalados esas codificaciones no se ofrecen.
+
+import zlib
+from typing import List, Optional, Sequence
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    b"text/plain",
+    b"text/csv",
+    b"text/html",
+    b"application/json",
+    b"application/x-ndjson",
+    b"application/msgpack",
+    b"application/x-msgpack",
+)
+
+
+class _Gzip:
+    def __init__(self):
+        self._obj = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+ENCODERS = {"gzip": _Gzip}
+if brotli is not None:
+    ENCODERS["br"] = _Brotli
+if zstandard is not None:
+    ENCODERS["zstd"] = _Zstd
+
+
+def choose_encoding(accept_encoding: str, preference: Sequence[str]) -> Optional[str]:
+    """La codificación con mayor q del cliente; los empates los decide `preference`."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        offered[name] = quality
+
+    best, best_q = None, 0.0
+    for name in preference:
+        if name not in ENCODERS:
+            continue
+        quality = offered.get(name, offered.get("*", 0.0))
+        if quality > best_q:
+            best, best_q = name, quality
+    return best
+
+
+def _append_vary(headers: List, value: bytes) -> None:
+    for index, (name, current) in enumerate(headers):
+        if name.lower() == b"vary":
+            if value.lower() not in current.lower():
+                headers[index] = (name, current + b", " + value)
+            return
+    headers.append((b"vary", value))
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, encodings: Sequence[str] = ("zstd", "br", "gzip")):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = [name for name in encodings if name in ENCODERS]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            return await self.app(scope, receive, send)
+
+        accept_encoding = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding, self.encodings)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        encoder = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = message.get("headers", [])
+                content_type = b""
+                for name, value in headers:
+                    lname = name.lower()
+                    if lname == b"content-encoding":
+                        passthrough = True
+                    elif lname == b"content-type":
+                        content_type = value.split(b";")[0].strip().lower()
+                if content_type not in COMPRESSIBLE_TYPES or message["status"] in (204, 304):
+                    passthrough = True
+                if passthrough:
+                    await send(message)
+                    start_message = None
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                # Primer bloque: decidir si vale la pena comprimir
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+
+                headers = [(n, v) for n, v in start_message.get("headers", []) if n.lower() != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode()))
+                _append_vary(headers, b"Accept-Encoding")
+                encoder = ENCODERS[encoding]()
+
+                if not more_body:
+                    compressed = encoder.compress(body) + encoder.finish()
+                    headers.append((b"content-length", str(len(compressed)).encode()))
+                    await send({**start_message, "headers": headers})
+                    start_message = None
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                await send({**start_message, "headers": headers})
+                start_message = None
+
+            chunk = encoder.compress(body) if body else b""
+            if not more_body:
+                chunk += encoder.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
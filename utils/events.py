@@ -0,0 +1,135 @@
+# utils/events.py
+#
+# Difusión de cambios de reservaciones a los clientes conectados por SSE
+# (GET /reservations/stream).
+#
+# EventBroker reparte cada evento a una cola acotada por suscriptor; si un cliente
+# no consume y su cola se llena, se le desconecta en lugar de frenar a los demás.
+# Con EVENTS_CHANGE_STREAM=true los eventos salen de un change stream de MongoDB
+# (requiere replica set), así todos los workers de uvicorn ven las escrituras de
+# los demás; si no, cada worker publica solo lo que escribe él mismo.
+
+import asyncio
+import logging
+from itertools import count
+from typing import AsyncIterator, Optional, Set
+
+import orjson
+
+from config import settings
+from utils.archive import find_archived
+from utils.serialization import reservation_to_json
+
+logger = logging.getLogger(__name__)
+
+_CLOSED = object()
+
+
+class Subscriber:
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.evicted = False
+
+
+class EventBroker:
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: Set[Subscriber] = set()
+        self._ids = count(1)
+        self.evictions = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Optional[Subscriber]:
+        if len(self._subscribers) >= self.max_subscribers:
+            return None
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def _evict(self, subscriber: Subscriber) -> None:
+        # Vaciar la cola para que el aviso de cierre siempre quepa
+        subscriber.evicted = True
+        self._subscribers.discard(subscriber)
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(_CLOSED)
+        self.evictions += 1
+
+    def publish(self, event: str, data: dict) -> None:
+        # El mensaje SSE se arma una sola vez para todos los suscriptores
+        message = f"id: {next(self._ids)}\nevent: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._evict(subscriber)
+
+    def close(self) -> None:
+        for subscriber in list(self._subscribers):
+            self._evict(subscriber)
+
+    async def stream(self, subscriber: Subscriber) -> AsyncIterator[str]:
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # mantiene viva la conexión a través de proxies
+                    continue
+                if message is _CLOSED:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+
+broker = EventBroker(
+    queue_size=settings.EVENTS_QUEUE_SIZE,
+    max_subscribers=settings.EVENTS_MAX_SUBSCRIBERS,
+)
+
+
+def publish_reservation_event(event: str, data: dict) -> None:
+    """Llamado desde reservation_router después de cada escritura."""
+    if settings.EVENTS_CHANGE_STREAM:
+        return  # el change stream lo publicará para todos los workers
+    broker.publish(event, data)
+
+
+_OPERATIONS = {"insert": "created", "update": "updated", "replace": "updated", "delete": "deleted"}
+
+
+async def watch_reservations(db) -> None:
+    """Publica en el broker local los cambios de `reservations` vistos por un change stream."""
+    resume_token = None
+    while True:
+        try:
+            async with db["reservations"].watch(
+                full_document="updateLookup", resume_after=resume_token
+            ) as change_stream:
+                async for change in change_stream:
+                    resume_token = change_stream.resume_token
+                    event = _OPERATIONS.get(change["operationType"])
+                    if event is None:
+                        continue
+                    if event == "deleted" and await find_archived(db, change["documentKey"]["_id"], {"_id": 1}):
+                        # Borrado de una pasada de archivo: la reservación sigue existiendo, no se avisa
+                        continue
+                    document = change.get("fullDocument")
+                    if event == "deleted" or document is None:
+                        broker.publish(event, {"id_reservation": str(change["documentKey"]["_id"])})
+                    else:
+                        broker.publish(event, reservation_to_json(document))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Change stream de reservaciones interrumpido, reintentando: %s", e)
+            await asyncio.sleep(1)
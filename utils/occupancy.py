@@ -0,0 +1,185 @@
+# utils/occupancy.py
+#
+# Ocupación por día para reservar sin condiciones de carrera.
+#
+# Cada sala y día tiene un documento en `reservation_occupancy` con un campo entero por hora
+# ("h00".."h23"); el bit i de "hNN" indica que el minuto i de esa hora está ocupado.
+# Reservar es un único update condicional: solo aplica si todos los bits del rango
+# están libres (ninguno con $bitsAnySet) y los marca con $bit en la misma operación.
+#
+# Para reconstruir la ocupación a partir de las reservaciones existentes:
+#
+#   python -m utils.occupancy rebuild
+
+import asyncio
+from datetime import date, datetime
+from typing import Dict, List, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from utils.archive import reservation_collections
+
+OCCUPANCY_COLLECTION = "reservation_occupancy"
+MINUTES_PER_HOUR = 60
+FULL_HOUR = (1 << MINUTES_PER_HOUR) - 1
+
+
+def occupancy_key(day: date, id_room=None) -> str:
+    # Las reservaciones sin sala (anteriores a las salas) comparten el calendario global del día
+    if id_room is None:
+        return day.isoformat()
+    return f"{id_room}:{day.isoformat()}"
+
+
+def _minute_of_day(value) -> int:
+    if isinstance(value, datetime):
+        value = value.time()
+    return value.hour * 60 + value.minute
+
+
+def minute_masks(start, end) -> Dict[str, int]:
+    """Máscaras por hora para los minutos [start, end)."""
+    first, last = _minute_of_day(start), _minute_of_day(end)
+    masks = {}
+    for hour in range(first // MINUTES_PER_HOUR, -(-last // MINUTES_PER_HOUR)):
+        lo = max(first, hour * MINUTES_PER_HOUR) - hour * MINUTES_PER_HOUR
+        hi = min(last, (hour + 1) * MINUTES_PER_HOUR) - hour * MINUTES_PER_HOUR
+        if hi > lo:
+            masks[f"h{hour:02d}"] = ((1 << hi) - 1) ^ ((1 << lo) - 1)
+    return masks
+
+
+async def claim_slot(db, key: str, start, end) -> bool:
+    """Marca [start, end) como ocupado si está libre. Devuelve False si hay traslape."""
+    masks = minute_masks(start, end)
+    if not masks:
+        return False
+    return await _claim_masks(db, key, masks)
+
+
+async def _claim_masks(db, key: str, masks: Dict[str, int]) -> bool:
+    # $not/$bitsAnySet y no $bitsAllClear: los operadores de bits nunca coinciden con un
+    # campo que no existe, y una hora que nadie ha reservado todavía no está en el documento
+    query = {"_id": key}
+    query.update({field: {"$not": {"$bitsAnySet": mask}} for field, mask in masks.items()})
+    update = {"$bit": {field: {"or": mask} for field, mask in masks.items()}}
+    try:
+        # Si el día aún no existe se crea; si existe pero algún bit está ocupado,
+        # el upsert intenta insertar el mismo _id y Mongo lo rechaza
+        await db[OCCUPANCY_COLLECTION].update_one(query, update, upsert=True)
+        return True
+    except DuplicateKeyError:
+        pass
+
+    # El documento ya existe (o lo creó otra petición al mismo tiempo): reintento sin upsert
+    result = await db[OCCUPANCY_COLLECTION].update_one(query, update)
+    return result.modified_count == 1
+
+
+async def release_slot(db, key: str, start, end) -> None:
+    await _release_masks(db, key, minute_masks(start, end))
+
+
+async def _release_masks(db, key: str, masks: Dict[str, int]) -> None:
+    if not masks:
+        return
+    await db[OCCUPANCY_COLLECTION].update_one(
+        {"_id": key},
+        {"$bit": {field: {"and": FULL_HOUR ^ mask} for field, mask in masks.items()}},
+    )
+
+
+async def move_slot(db, old_key: str, old_start, old_end, new_key: str, new_start, new_end) -> bool:
+    """Mueve una ocupación ya apartada. Devuelve False (sin tocar nada) si el destino choca.
+
+    Primero se aparta lo nuevo y después se libera lo que ya no se usa: en ningún momento
+    la reservación se queda sin sus minutos, así que nadie puede ganárselos a la mitad.
+    """
+    old_masks = minute_masks(old_start, old_end)
+    new_masks = minute_masks(new_start, new_end)
+    if not new_masks:
+        return False
+
+    if old_key != new_key:
+        if not await _claim_masks(db, new_key, new_masks):
+            return False
+        await _release_masks(db, old_key, old_masks)
+        return True
+
+    # Mismo día y sala: solo se apartan los minutos nuevos y se liberan los que sobran
+    added = {field: mask & ~old_masks.get(field, 0) for field, mask in new_masks.items()}
+    dropped = {field: mask & ~new_masks.get(field, 0) for field, mask in old_masks.items()}
+    added = {field: mask for field, mask in added.items() if mask}
+    dropped = {field: mask for field, mask in dropped.items() if mask}
+    if added and not await _claim_masks(db, new_key, added):
+        return False
+    await _release_masks(db, old_key, dropped)
+    return True
+
+
+async def find_conflicts(db, spans: List[Tuple[str, datetime, datetime]]) -> Dict[int, str]:
+    """Revisa muchas ocupaciones con una sola consulta.
+
+    Devuelve {índice: motivo} para los rangos que chocan con lo ya reservado o con
+    un rango anterior del mismo lote. Es una revisión previa: la reserva real
+    sigue siendo claim_slot, que es la que garantiza la atomicidad.
+    """
+    keys = list({key for key, _, _ in spans})
+    existing = {
+        doc["_id"]: doc
+        async for doc in db[OCCUPANCY_COLLECTION].find({"_id": {"$in": keys}})
+    }
+
+    conflicts: Dict[int, str] = {}
+    pending: Dict[str, Dict[str, int]] = {}
+    for index, (key, start, end) in enumerate(spans):
+        masks = minute_masks(start, end)
+        taken = existing.get(key, {})
+        batch = pending.setdefault(key, {})
+        if any(taken.get(field, 0) & mask for field, mask in masks.items()):
+            conflicts[index] = "Ya existe una reservación en ese horario."
+        elif any(batch.get(field, 0) & mask for field, mask in masks.items()):
+            conflicts[index] = "Se traslapa con otra reservación del mismo lote."
+        else:
+            for field, mask in masks.items():
+                batch[field] = batch.get(field, 0) | mask
+    return conflicts
+
+
+async def rebuild_occupancy(db) -> int:
+    """Recalcula todos los documentos de ocupación desde `reservations` y sus periodos archivados."""
+    days: Dict[str, Dict[str, int]] = {}
+    count = 0
+    # Un documento a media pasada de archivo puede salir dos veces; el OR de bits no cambia
+    for collection in await reservation_collections(db):
+        cursor = collection.find({}, {"id_room": 1, "select_date": 1, "start_time": 1, "end_time": 1})
+        async for doc in cursor:
+            key = occupancy_key(doc["select_date"].date(), doc.get("id_room"))
+            fields = days.setdefault(key, {})
+            for field, mask in minute_masks(doc["start_time"], doc["end_time"]).items():
+                fields[field] = fields.get(field, 0) | mask
+            count += 1
+
+    await db[OCCUPANCY_COLLECTION].delete_many({})
+    if days:
+        await db[OCCUPANCY_COLLECTION].insert_many([{"_id": key, **fields} for key, fields in days.items()])
+    return count
+
+
+async def _rebuild() -> int:
+    from database import connection
+
+    db = await connection.connect()
+    try:
+        return await rebuild_occupancy(db)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["rebuild"]:
+        raise SystemExit("Uso: python -m utils.occupancy rebuild")
+    total = asyncio.run(_rebuild())
+    print(f"Ocupación reconstruida a partir de {total} reservaciones.")
@@ -0,0 +1,124 @@
+import asyncio
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+from config import settings
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    # Nunca devolver más de MAX_PAGE_SIZE documentos por página
+    if not limit or limit < 1:
+        return settings.DEFAULT_PAGE_SIZE
+    return min(limit, settings.MAX_PAGE_SIZE)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$oid" in value:
+            return ObjectId(value["$oid"])
+        if "$date" in value:
+            return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(doc: dict, keys: Sequence[str]) -> str:
+    # El cursor es opaco para el cliente: base64 de los valores de las llaves de orden
+    raw = json.dumps([_encode_value(doc.get(key)) for key in keys], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, keys: Sequence[str]) -> List[Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor mal formado")
+        return [_decode_value(v) for v in values]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido",
+        )
+
+
+def keyset_filter(keys: Sequence[str], values: Sequence[Any]) -> dict:
+    # (k1 > v1) OR (k1 == v1 AND k2 > v2) OR ... para orden ascendente
+    branches = []
+    for i, key in enumerate(keys):
+        branch = {keys[j]: values[j] for j in range(i)}
+        branch[key] = {"$gt": values[i]}
+        branches.append(branch)
+    return {"$or": branches}
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    keys: Sequence[str],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Devuelve una página de documentos ordenados por `keys` y el cursor siguiente."""
+    limit = clamp_limit(limit)
+
+    if cursor:
+        after = keyset_filter(keys, decode_cursor(cursor, keys))
+        query = {"$and": [query, after]} if query else after
+
+    sort = [(key, 1) for key in keys]
+    docs = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], keys)
+    return docs, next_cursor
+
+
+async def fetch_merged_page(
+    collections: Sequence,
+    query: dict,
+    keys: Sequence[str],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Como fetch_page pero sobre varias colecciones con el mismo orden (la caliente y el archivo)."""
+    if len(collections) == 1:
+        return await fetch_page(collections[0], query, keys, limit=limit, cursor=cursor, projection=projection)
+
+    limit = clamp_limit(limit)
+    if cursor:
+        after = keyset_filter(keys, decode_cursor(cursor, keys))
+        query = {"$and": [query, after]} if query else after
+
+    # Cada colección aporta a lo más limit+1; la página sale de mezclar esos candidatos
+    sort = [(key, 1) for key in keys]
+    results = await asyncio.gather(*(
+        collection.find(query, projection).sort(sort).limit(limit + 1).to_list(length=limit + 1)
+        for collection in collections
+    ))
+
+    # Un documento a media pasada de archivo puede venir de dos colecciones: se queda uno
+    merged = {doc["_id"]: doc for docs in results for doc in docs}
+    docs = sorted(merged.values(), key=lambda doc: tuple(doc.get(key) for key in keys))
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], keys)
+    return docs, next_cursor
@@ -0,0 +1,68 @@
+# utils/refresh_tokens.py
+#
+# Refresh tokens con rotación. Cada token es un JWT con "jti" y "family"; en Mongo
+# (`refresh_tokens`) solo se guarda su sha256, indexado por _id = jti y con TTL en expires_at.
+#
+# Renovar cuesta verificar la firma (HMAC) y un find_one_and_update por _id que marca el
+# token como usado; no hay bcrypt. Si llega un token ya usado es que alguien lo copió:
+# se revoca toda la familia y el usuario tiene que volver a iniciar sesión.
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+from fastapi import HTTPException, status
+
+from config import settings
+from utils.jwt_utils import create_refresh_token, verify_refresh_token
+from utils.revocation_cache import token_digest
+
+REFRESH_COLLECTION = "refresh_tokens"
+
+
+async def issue_refresh_token(db, user_id: str, family: str = None) -> str:
+    """Crea y registra un refresh token nuevo (una familia nueva si no se indica)."""
+    jti = uuid.uuid4().hex
+    family = family or uuid.uuid4().hex
+    expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    token = create_refresh_token({"sub": user_id, "jti": jti, "family": family}, expires_at)
+
+    await db[REFRESH_COLLECTION].insert_one({
+        "_id": jti,
+        "token_hash": token_digest(token),
+        "family": family,
+        "id_user": user_id,
+        "expires_at": expires_at,
+        "used_at": None,
+    })
+    return token
+
+
+async def rotate_refresh_token(db, token: str) -> Tuple[str, str]:
+    """Consume `token` y devuelve (user_id, refresh token nuevo de la misma familia)."""
+    payload = verify_refresh_token(token)
+
+    consumed = await db[REFRESH_COLLECTION].find_one_and_update(
+        {"_id": payload["jti"], "token_hash": token_digest(token), "used_at": None},
+        {"$set": {"used_at": datetime.now(timezone.utc)}},
+        projection={"family": 1, "id_user": 1},
+    )
+    if consumed is None:
+        # Reutilización de un token ya rotado (o familia revocada): se corta la familia entera
+        await revoke_family(db, payload.get("family"))
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token revocado. Inicia sesión nuevamente.",
+        )
+
+    new_token = await issue_refresh_token(db, consumed["id_user"], family=consumed["family"])
+    return consumed["id_user"], new_token
+
+
+async def revoke_family(db, family: str) -> None:
+    if family:
+        await db[REFRESH_COLLECTION].delete_many({"family": family})
+
+
+async def revoke_user_refresh_tokens(db, user_id: str) -> None:
+    await db[REFRESH_COLLECTION].delete_many({"id_user": user_id})
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from config import settings
+
+
+def token_digest(token: str) -> str:
+    # Nunca guardamos en memoria el JWT completo, solo su hash
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Mongo devuelve fechas UTC sin tz
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _timestamp(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return _as_utc(value).timestamp()
+    return float(value)
+
+
+class RevocationCache:
+    """Copia local de `revoked_token` para responder "no revocado" sin ir a Mongo.
+
+    Se refresca de forma incremental (por `revoked_dt`) como máximo cada
+    `staleness` segundos; cada entrada vive hasta el `exp` de su token.
+    `revoked_dt` lo pone el cliente antes de insertar, así que no llega en orden:
+    cada refresco relee `staleness + clock_skew` segundos antes del más nuevo visto.
+    Si se desborda con revocaciones vigentes se consulta Mongo en cada petición y, cada
+    `staleness` segundos, se intenta recargar completa cuando ya vuelven a caber.
+    """
+
+    def __init__(self, staleness: float, max_entries: int, clock_skew: float = 0.0):
+        self.staleness = staleness
+        self.max_entries = max_entries
+        self.lookback = timedelta(seconds=staleness + clock_skew)
+        self._entries: "OrderedDict[str, Optional[float]]" = OrderedDict()
+        self._last_seen: Optional[datetime] = None
+        self._synced_at: Optional[float] = None
+        self._overflowed = False
+        self._live_evictions = 0
+        self._lock = asyncio.Lock()
+
+    def add(self, digest: str, expires_at=None) -> None:
+        exp = _timestamp(expires_at)
+        if exp is not None and exp <= time.time():
+            return
+        self._entries[digest] = exp
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            _, evicted_exp = self._entries.popitem(last=False)
+            if evicted_exp is None or evicted_exp > time.time():
+                # Se perdió una revocación vigente: consultamos Mongo hasta que vuelvan a caber
+                self._overflowed = True
+                self._live_evictions += 1
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        expired = [d for d, exp in self._entries.items() if exp is not None and exp <= now]
+        for digest in expired:
+            del self._entries[digest]
+
+    @staticmethod
+    def _live_query() -> dict:
+        return {"$or": [{"expires_at": {"$gt": datetime.now(timezone.utc)}}, {"expires_at": None}]}
+
+    async def refresh(self, db) -> None:
+        if self._last_seen is not None:
+            # Volver a agregar una revocación ya conocida no cambia nada
+            query = {"revoked_dt": {"$gte": self._last_seen - self.lookback}}
+        else:
+            query = self._live_query()
+
+        cursor = db["revoked_token"].find(query, {"token": 1, "token_hash": 1, "revoked_dt": 1, "expires_at": 1})
+        async for doc in cursor:
+            digest = doc.get("token_hash") or (doc.get("token") and token_digest(doc["token"]))
+            if digest:
+                self.add(digest, doc.get("expires_at"))
+            revoked_dt = doc.get("revoked_dt")
+            if revoked_dt is not None:
+                revoked_dt = _as_utc(revoked_dt)
+            if revoked_dt is not None and (self._last_seen is None or revoked_dt > self._last_seen):
+                self._last_seen = revoked_dt
+
+        if self._last_seen is None:
+            self._last_seen = datetime.now(timezone.utc)
+        self._purge_expired()
+        self._synced_at = time.monotonic()
+
+    async def _resync(self, db) -> None:
+        """Con la caché desbordada: si las revocaciones vigentes ya caben, recarga todo desde cero."""
+        self._synced_at = time.monotonic()
+        if await db["revoked_token"].count_documents(self._live_query()) >= self.max_entries:
+            return
+        # _overflowed sigue en True durante la recarga: mientras tanto se responde desde Mongo
+        evictions = self._live_evictions
+        self._entries.clear()
+        self._last_seen = None
+        await self.refresh(db)
+        if self._live_evictions == evictions:
+            self._overflowed = False
+
+    def _is_stale(self) -> bool:
+        return self._synced_at is None or time.monotonic() - self._synced_at >= self.staleness
+
+    async def is_revoked(self, db, token: str) -> bool:
+        digest = token_digest(token)
+
+        if self._overflowed and self._is_stale():
+            async with self._lock:
+                if self._overflowed and self._is_stale():
+                    await self._resync(db)
+
+        if self._overflowed:
+            revoked = await db["revoked_token"].find_one(
+                {"$or": [{"token_hash": digest}, {"token": token}]}, {"_id": 1}
+            )
+            return revoked is not None
+
+        if self._is_stale():
+            async with self._lock:
+                if self._is_stale():
+                    await self.refresh(db)
+
+        exp = self._entries.get(digest, 0)
+        return digest in self._entries and (exp is None or exp > time.time())
+
+
+revocation_cache = RevocationCache(
+    staleness=settings.REVOCATION_CACHE_STALENESS_SECONDS,
+    max_entries=settings.REVOCATION_CACHE_MAX_ENTRIES,
+    clock_skew=settings.REVOCATION_CLOCK_SKEW_SECONDS,
+)
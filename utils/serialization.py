@@ -0,0 +1,205 @@
+# utils/serialization.py
+#
+# Camino rápido para respuestas de lectura: el documento BSON se convierte una sola vez
+# a tipos JSON y se codifica con orjson. Los endpoints que lo usan devuelven
+# FastJSONResponse, así FastAPI no vuelve a validar contra el response_model (que se
+# conserva solo para la documentación OpenAPI). Las llaves y formatos son los mismos
+# que producen ReservationResponseModel, Room y User.
+#
+# Con ?fields=name_event,select_date solo se piden a Mongo esos campos (proyección) y solo
+# esos se serializan; las tablas *_FIELDS dicen de qué campo de Mongo sale cada llave.
+#
+# Con `Accept: application/msgpack` (y msgpack instalado) el mismo contenido sale en
+# MessagePack; ver negotiated_response.
+
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+try:
+    import msgpack
+except ImportError:  # opcional: sin msgpack solo se sirve JSON
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def _accept_quality(accept: str, media_types: Sequence[str]) -> float:
+    best = 0.0
+    for part in accept.split(","):
+        media, _, params = part.strip().partition(";")
+        if media.strip().lower() not in media_types:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        best = max(best, quality)
+    return best
+
+
+def wants_msgpack(request: Request) -> bool:
+    """True si el cliente prefiere MessagePack sobre JSON (y el servidor lo tiene)."""
+    if msgpack is None:
+        return False
+    accept = request.headers.get("accept", "")
+    msgpack_q = _accept_quality(accept, MSGPACK_MEDIA_TYPES)
+    return msgpack_q > 0 and msgpack_q >= _accept_quality(accept, ("application/json",))
+
+
+def negotiated_response(request: Request, content: Any, headers: Optional[dict] = None) -> Response:
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept"
+    response_class = MsgPackResponse if wants_msgpack(request) else FastJSONResponse
+    return response_class(content, headers=headers)
+
+
+def _date(value) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).date().isoformat()
+    return value
+
+
+def _time(value) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.time().isoformat()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).time().isoformat()
+    if value is not None:
+        return value.isoformat()
+    return None
+
+
+def _id(value) -> Optional[str]:
+    return str(value) if value else None
+
+
+# Llave de salida -> (campo en Mongo, conversión)
+FieldTable = Dict[str, Tuple[str, Callable[[dict], Any]]]
+
+RESERVATION_FIELDS: FieldTable = {
+    "name_event": ("name_event", lambda doc: doc["name_event"]),
+    "description": ("description", lambda doc: doc.get("description")),
+    "select_date": ("select_date", lambda doc: _date(doc.get("select_date"))),
+    "start_time": ("start_time", lambda doc: _time(doc["start_time"])),
+    "end_time": ("end_time", lambda doc: _time(doc["end_time"])),
+    "materia": ("materia", lambda doc: doc.get("materia")),
+    "id_reservation": ("_id", lambda doc: str(doc["_id"])),
+    "name_user": ("name_user", lambda doc: doc["name_user"]),
+    "id_user": ("id_user", lambda doc: _id(doc.get("id_user"))),
+    "id_room": ("id_room", lambda doc: _id(doc.get("id_room"))),
+}
+
+ROOM_FIELDS: FieldTable = {
+    "name": ("name", lambda doc: doc["name"]),
+    "ubication": ("ubication", lambda doc: doc["ubication"]),
+    "capacity": ("capacity", lambda doc: doc.get("capacity")),
+    "availability": ("availability", lambda doc: doc.get("availability", True)),
+    "_id": ("_id", lambda doc: str(doc["_id"])),
+}
+
+USER_FIELDS: FieldTable = {
+    "_id": ("_id", lambda doc: str(doc["_id"])),
+    "name": ("name", lambda doc: doc["name"]),
+    "email": ("email", lambda doc: doc["email"]),
+}
+
+
+def parse_fields(raw: Optional[str], table: FieldTable) -> Optional[List[str]]:
+    """Valida ?fields= contra la tabla del modelo. None si no se pidió (respuesta completa)."""
+    if raw is None:
+        return None
+    fields = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in table]
+    if not fields or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos inválidos: {', '.join(unknown) or '(vacío)'}. Permitidos: {', '.join(table)}",
+        )
+    return fields
+
+
+def fields_projection(fields: Optional[Sequence[str]], table: FieldTable, default: Optional[dict] = None,
+                      required: Iterable[str] = ()) -> Optional[dict]:
+    """Proyección de Mongo para `fields`; `required` son campos que el servidor necesita (p. ej. llaves del cursor)."""
+    if fields is None:
+        return default
+    projection = {table[name][0]: 1 for name in fields}
+    projection.update({name: 1 for name in required})
+    return projection
+
+
+def _pick(doc: dict, fields: Sequence[str], table: FieldTable) -> dict:
+    return {name: table[name][1](doc) for name in fields}
+
+
+def reservation_to_json(doc: dict, fields: Optional[Sequence[str]] = None) -> dict:
+    if fields is not None:
+        return _pick(doc, fields, RESERVATION_FIELDS)
+    return {
+        "name_event": doc["name_event"],
+        "description": doc.get("description"),
+        "select_date": _date(doc.get("select_date")),
+        "start_time": _time(doc["start_time"]),
+        "end_time": _time(doc["end_time"]),
+        "materia": doc.get("materia"),
+        "id_reservation": str(doc["_id"]),
+        "name_user": doc["name_user"],
+        "id_user": _id(doc.get("id_user")),
+        "id_room": _id(doc.get("id_room")),
+    }
+
+
+def room_to_json(doc: dict, fields: Optional[Sequence[str]] = None) -> dict:
+    if fields is not None:
+        return _pick(doc, fields, ROOM_FIELDS)
+    return {
+        "name": doc["name"],
+        "ubication": doc["ubication"],
+        "capacity": doc.get("capacity"),
+        "availability": doc.get("availability", True),
+        "_id": str(doc["_id"]),
+    }
+
+
+def user_to_json(doc: dict, fields: Optional[Sequence[str]] = None) -> dict:
+    if fields is not None:
+        return _pick(doc, fields, USER_FIELDS)
+    return {
+        "_id": str(doc["_id"]),
+        "name": doc["name"],
+        "email": doc["email"],
+    }
+
+
+def page_to_json(items: list, next_cursor: Optional[str]) -> dict:
+    return {"items": items, "next": next_cursor}
+
+
+def batch_to_json(items: list, missing: list) -> dict:
+    return {"items": items, "missing": [str(id) for id in missing]}
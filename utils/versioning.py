@@ -0,0 +1,87 @@
+# utils/versioning.py
+#
+# Versión por colección para GET condicionales. Cada create/update/delete de salas o
+# reservaciones incrementa un contador en `collection_versions`; los GET arman un ETag
+# débil con esa versión y, si coincide con If-None-Match, responden 304 sin consultar
+# ni serializar documentos.
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Sequence, Tuple
+
+from fastapi import Request, Response, status
+from pymongo import ReturnDocument
+
+from utils.serialization import wants_msgpack
+
+VERSIONS_COLLECTION = "collection_versions"
+
+
+async def bump_version(db, collection: str) -> int:
+    doc = await db[VERSIONS_COLLECTION].find_one_and_update(
+        {"_id": collection},
+        {"$inc": {"version": 1}, "$currentDate": {"updated_at": True}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["version"]
+
+
+async def get_versions(db, collections: Sequence[str]) -> Tuple[dict, Optional[datetime]]:
+    versions = {name: 0 for name in collections}
+    last_modified = None
+    async for doc in db[VERSIONS_COLLECTION].find({"_id": {"$in": list(collections)}}):
+        versions[doc["_id"]] = doc.get("version", 0)
+        updated_at = doc.get("updated_at")
+        if updated_at is not None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc) if updated_at.tzinfo is None else updated_at
+            last_modified = updated_at if last_modified is None else max(last_modified, updated_at)
+    return versions, last_modified
+
+
+def make_etag(request: Request, versions: dict) -> str:
+    # La misma versión con otros parámetros (página, filtros) o en msgpack es otra representación
+    resource = f"{request.url.path}?{request.url.query}"
+    if wants_msgpack(request):
+        resource += ";msgpack"
+    digest = hashlib.sha1(resource.encode()).hexdigest()[:12]
+    stamp = ".".join(f"{name}-{version}" for name, version in sorted(versions.items()))
+    return f'W/"{stamp}.{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+async def conditional_get(request: Request, db, collections: Sequence[str]) -> Tuple[Optional[Response], dict]:
+    """Devuelve (respuesta 304 o None, headers de caché para la respuesta normal)."""
+    versions, last_modified = await get_versions(db, collections)
+    headers = {"ETag": make_etag(request, versions), "Cache-Control": "no-cache", "Vary": "Accept"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(microsecond=0), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, headers["ETag"])
+    else:
+        not_modified = False
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and last_modified is not None:
+            try:
+                not_modified = last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                not_modified = False
+
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers), headers
+    return None, headers